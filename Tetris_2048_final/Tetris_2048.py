@@ -6,300 +6,210 @@
 
 import lib.stddraw as stddraw  # for creating an animation with user interactions
 from lib.picture import Picture  # used for displaying an image on the game menu
+from lib.picture import preload  # used for loading the images only once
 from lib.color import Color  # used for coloring the game menu
 import os  # the os module is used for file and directory operations
-from game_grid import GameGrid  # the class for modeling the game grid
-from tetromino import Tetromino  # the class for modeling the tetrominoes
-import random  # used for creating tetrominoes with random types (shapes)
-import keyboard
-
-# The main function where this program starts execution
-def start():
+# the game rules are applied by the headless game engine (see engine.py)
+from engine import GameEngine
+# the key presses are turned into the actions of the game by an input handler
+from input_handler import InputHandler
+# the phases of the game loop can be timed by a profiler (see profiler.py)
+from profiler import PhaseProfiler
+# the games can be recorded and played back (see replay.py)
+from replay import ReplayWriter, load_replays, play_replay, replay_steps
+from replay import create_game
+import argparse  # used for parsing the command line arguments
+import random  # used for generating the seeds of the games
+import time  # used for timing the auto fall steps and the frames
+
+# the time between two auto fall steps of the active tetromino (in seconds)
+GRAVITY_INTERVAL = 0.25
+# the maximum number of frames displayed per second
+TARGET_FPS = 60
+# the key that shows or hides the overlay of the profiler and the time between
+# two updates of the overlay (in seconds)
+PROFILER_OVERLAY_KEY = "f3"
+PROFILER_OVERLAY_INTERVAL = 0.25
+
+# the states of the program (the menu, playing a game and the game over menu)
+MENU, PLAYING, GAME_OVER = "menu", "playing", "game over"
+
+# The main function where this program starts execution (the phases of the
+# game loop are timed when a profiler is given, the seeds of the games are
+# generated from the given seed, if any, so that they can be reproduced, and
+# the games are recorded by the given replay writer, if any)
+def start(profiler=None, seed=None, replay_writer=None):
    # set the dimensions of the game grid
    grid_h, grid_w = 20, 12
    # extra space on the right for pause button and score table
    extra_space = 5
-   # set the size of the drawing canvas (the displayed window)
-   canvas_h, canvas_w = 40 * grid_h, 40 * (grid_w + extra_space)
-   stddraw.setCanvasSize(canvas_w, canvas_h)
-   # set the scale of the coordinate system for the drawing canvas
-   stddraw.setXscale(-0.5, grid_w + extra_space - 0.5)
-   stddraw.setYscale(-0.5, grid_h - 0.5)
-
-   # set the game grid dimension values stored and used in the Tetromino class
-   Tetromino.grid_height = grid_h
-   Tetromino.grid_width = grid_w
-   # create the game grid
-   grid = GameGrid(grid_h, grid_w, extra_space)
-   # create the first tetromino to enter the game grid
-   # by using the create_tetromino function defined below
-   current_tetromino = create_tetromino()
-   grid.current_tetromino = current_tetromino
-
-   # display a simple menu before opening the game
-   # by using the display_game_menu function defined below
-   display_game_menu(grid_h, grid_w)
-
-   # the main game loop
+   # set up the drawing canvas for the game grid
+   setup_canvas(grid_h, grid_w, extra_space)
+   # load the images used by the menus and the game grid once at the start
+   current_dir = os.path.dirname(os.path.realpath(__file__))
+   preload(current_dir + "/images/menu_image.png",
+           current_dir + "/images/pngwing.com.png")
+
+   # a single loop that switches between the states of the program, so that
+   # restarting a game does not start a new (nested) loop
+   state, game = MENU, None
+   # the random number stream of the seeds of the games
+   seeds = random.Random(seed)
    while True:
-      # check for any user interaction via the keyboard
-      if stddraw.hasNextKeyTyped():  # check if the user has pressed a key
-         key_typed = stddraw.nextKeyTyped()  # the most recently pressed key
-         # if the left arrow key has been pressed
-         if key_typed == "left":
-            # move the active tetromino left by one
-            current_tetromino.move(key_typed, grid)
-         # if the right arrow key has been pressed
-         elif key_typed == "right":
-            # move the active tetromino right by one
-            current_tetromino.move(key_typed, grid)
-         # if the down arrow key has been pressed
-         elif key_typed == "down":
-            # move the active tetromino down by one
-            # (soft drop: causes the tetromino to fall down faster)
-            current_tetromino.move(key_typed, grid)
-         elif key_typed == "up":
-             # Call the rotate method of the current tetromino
-             current_tetromino.rotate(grid)
-         elif keyboard.is_pressed('shift'):
-            # cause the active tetromino to hard drop
-            current_tetromino.hard_drop(grid)
-            # Process the landing of the tetromino immediately
-            process_landing(current_tetromino, grid)
-
-         # clear the queue of the pressed keys for a smoother interaction
-         stddraw.clearKeysTyped()
-
-      if stddraw.mousePressed():
-          # get the coordinates of the most recent location at which the mouse
-          # has been left-clicked
-          mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-          # check if these coordinates are inside the button
-          if mouse_x >= 15 and mouse_x <= 16 + 1:
-              if mouse_y >= 18 and mouse_y <= 18 + 1:
-                  restart_state()
-
-      # move the active tetromino down by one at each iteration (auto fall)
-      success = current_tetromino.move("down", grid)
-      # lock the active tetromino onto the grid when it cannot go down anymore
-      if not success:
-         # get the tile matrix of the tetromino without empty rows and columns
-         # and the position of the bottom left cell in this matrix
-         tiles, pos = current_tetromino.get_min_bounded_tile_matrix(True)
-         # update the game grid by locking the tiles of the landed tetromino
-         game_over = grid.update_grid(tiles, pos)
-         # end the main game loop if the game is over
-         if game_over:
-            display_game_menu_over(grid_h, grid_w)
-
-         handle_free_tiles(grid)
-         merge_tiles(grid)  # Call merge function here
-         clear_full_rows(grid)
-         reset_merged_flags(grid)
-         # create the next tetromino to enter the game grid
-         # by using the create_tetromino function defined below
-         current_tetromino = create_tetromino()
-         grid.current_tetromino = current_tetromino
-
-      # display the game grid with the current tetromino
-      grid.display()
-
-
-def restart_state():
-   # set the dimensions of the game grid
-   grid_h, grid_w = 20, 12
-   # set the size of the drawing canvas (the displayed window)
-   extra_space = 5
-   # set the size of the drawing canvas (the displayed window)
-   canvas_h, canvas_w = 40 * grid_h, 40 * (grid_w + extra_space)
-   # set the scale of the coordinate system for the drawing canvas
-   stddraw.setXscale(-0.5, grid_w + extra_space - 0.5)
-   stddraw.setYscale(-0.5, grid_h - 0.5)
-
-   # set the game grid dimension values stored and used in the Tetromino class
-   Tetromino.grid_height = grid_h
-   Tetromino.grid_width = grid_w
-   # create the game grid
-   grid = GameGrid(grid_h, grid_w, extra_space)
-   # create the first tetromino to enter the game grid
-   # by using the create_tetromino function defined below
-   current_tetromino = create_tetromino()
-   grid.current_tetromino = current_tetromino
-
-   # display a simple menu before opening the game
-   # by using the display_game_menu function defined below
-   display_game_menu(grid_h, grid_w)
-
-   # the main game loop
-   while True:
-      # check for any user interaction via the keyboard
-      if stddraw.hasNextKeyTyped():  # check if the user has pressed a key
-         key_typed = stddraw.nextKeyTyped()  # the most recently pressed key
-         # if the left arrow key has been pressed
-         if key_typed == "left":
-            # move the active tetromino left by one
-            current_tetromino.move(key_typed, grid)
-         # if the right arrow key has been pressed
-         elif key_typed == "right":
-            # move the active tetromino right by one
-            current_tetromino.move(key_typed, grid)
-         # if the down arrow key has been pressed
-         elif key_typed == "down":
-            # move the active tetromino down by one
-            # (soft drop: causes the tetromino to fall down faster)
-            current_tetromino.move(key_typed, grid)
-         elif key_typed == "up":
-             # Call the rotate method of the current tetromino
-             current_tetromino.rotate(grid)
-         elif keyboard.is_pressed('shift'):
-            # cause the active tetromino to hard drop
-            current_tetromino.hard_drop(grid)
-            # Process the landing of the tetromino immediately
-            process_landing(current_tetromino, grid)
-
-         # clear the queue of the pressed keys for a smoother interaction
-         stddraw.clearKeysTyped()
-
-      if stddraw.mousePressed():
-          # get the coordinates of the most recent location at which the mouse
-          # has been left-clicked
-          mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-          # check if these coordinates are inside the button
-          if mouse_x >= 15 and mouse_x <= 16 + 1:
-              if mouse_y >= 18 and mouse_y <= 18 + 1:
-                  restart_state()
-
-      # move the active tetromino down by one at each iteration (auto fall)
-      success = current_tetromino.move("down", grid)
-
-      # lock the active tetromino onto the grid when it cannot go down anymore
-      if not success:
-         # get the tile matrix of the tetromino without empty rows and columns
-         # and the position of the bottom left cell in this matrix
-         tiles, pos = current_tetromino.get_min_bounded_tile_matrix(True)
-         # update the game grid by locking the tiles of the landed tetromino
-         game_over = grid.update_grid(tiles, pos)
-         # end the main game loop if the game is over
-         if game_over:
-            display_game_menu_over(grid_h, grid_w)
-
-         handle_free_tiles(grid)
-         merge_tiles(grid)  # Call merge function here
-         clear_full_rows(grid)
-         reset_merged_flags(grid)
-         # create the next tetromino to enter the game grid
-         # by using the create_tetromino function defined below
-         current_tetromino = create_tetromino()
-         grid.current_tetromino = current_tetromino
-
-      # display the game grid with the current tetromino
-      grid.display()
-
-   # print a message on the console when the game is over
-
-
-def gameover_state():
-   # set the dimensions of the game grid
-   grid_h, grid_w = 20, 12
-   # set the size of the drawing canvas (the displayed window)
-   extra_space = 5
+      if state == MENU:
+         # display a simple menu before opening the game
+         # by using the display_game_menu function defined below
+         display_game_menu(grid_h, grid_w)
+         # create a new game (the game grid and the first tetromino); the
+         # previous game is released as it is not referenced anymore
+         game = GameEngine(grid_h, grid_w, extra_space, profiler=profiler,
+                           seed=seeds.randrange(2 ** 32))
+         if replay_writer is not None:
+            replay_writer.start_game(game)
+         state = PLAYING
+      elif state == PLAYING:
+         # run the main game loop until the game is restarted or over
+         # by using the run_game_loop function defined below
+         state = run_game_loop(game)
+         if replay_writer is not None:
+            replay_writer.end_game()
+      elif state == GAME_OVER:
+         # display the game over menu that returns to the menu
+         game = None
+         display_game_menu_over(grid_h, grid_w)
+         state = MENU
+
+
+# A function for setting up the drawing canvas for a game grid with the given
+# dimensions
+def setup_canvas(grid_h, grid_w, extra_space):
    # set the size of the drawing canvas (the displayed window)
    canvas_h, canvas_w = 40 * grid_h, 40 * (grid_w + extra_space)
+   stddraw.setCanvasSize(canvas_w, canvas_h)
    # set the scale of the coordinate system for the drawing canvas
    stddraw.setXscale(-0.5, grid_w + extra_space - 0.5)
    stddraw.setYscale(-0.5, grid_h - 0.5)
 
-   # set the game grid dimension values stored and used in the Tetromino class
-   Tetromino.grid_height = grid_h
-   Tetromino.grid_width = grid_w
-   # create the game grid
-   grid = GameGrid(grid_h, grid_w, extra_space)
-   # create the first tetromino to enter the game grid
-   # by using the create_tetromino function defined below
-   current_tetromino = create_tetromino()
-   grid.current_tetromino = current_tetromino
-
-   # display a simple menu before opening the game
-   # by using the display_game_menu function defined below
-   display_game_menu(grid_h, grid_w)
 
-   # the main game loop
+# A function for displaying the playback of a recorded game (see replay.py)
+# at the given speed relative to the speed of the game (e.g. 2 for twice as
+# fast), and returning the game at the end of the playback
+def run_replay(game_replay, speed=1.0, extra_space=5,
+               gravity_interval=GRAVITY_INTERVAL, target_fps=TARGET_FPS):
+   setup_canvas(game_replay.grid_h, game_replay.grid_w, extra_space)
+   game = create_game(game_replay)
+   tick_interval = gravity_interval / speed
+   frame_interval = 1 / target_fps
+   start_time = time.perf_counter()
+   next_frame_time = start_time
+   for game in replay_steps(game_replay, game):
+      # display the frames until the time of the current tick of the game
+      tick_time = start_time + game.ticks * tick_interval
+      while True:
+         now = time.perf_counter()
+         if now >= next_frame_time:
+            game.grid.display()
+            next_frame_time = max(next_frame_time + frame_interval, now)
+         if now >= tick_time:
+            break
+         stddraw.waitForEvent(min(tick_time, next_frame_time) - now)
+   game.grid.display()
+   return game
+
+
+# The main game loop with a fixed timestep: the user interactions are handled
+# as soon as they occur, the active tetromino falls down by one every
+# gravity_interval seconds and the game grid is displayed at most target_fps
+# times per second (the speed of the game does not depend on the drawing).
+# It returns the next state of the program (MENU or GAME_OVER).
+def run_game_loop(game, gravity_interval=GRAVITY_INTERVAL,
+                  target_fps=TARGET_FPS):
+   grid = game.grid
+   frame_interval = 1 / target_fps
+   # the profiler of the game (a disabled one does nothing)
+   profiler = game.profiler if game.profiler is not None else PhaseProfiler()
+   # the overlay of the profiler is displayed on the right of the game grid
+   overlay_region = (grid.grid_width - 0.3, 0, grid.extraspace - 0.4, 8)
+   next_overlay_time = 0
+   # the keys pressed before the game starts (e.g. on the menu) are ignored
+   input_handler = InputHandler()
+   stddraw.pollEvents()
+   input_handler.reset()
+   # the times of the next auto fall step and the next frame on a monotonic
+   # clock (perf_counter is not affected by system clock changes)
+   next_fall_time = time.perf_counter() + gravity_interval
+   next_frame_time = time.perf_counter()
    while True:
-      # check for any user interaction via the keyboard
-      if stddraw.hasNextKeyTyped():  # check if the user has pressed a key
-         key_typed = stddraw.nextKeyTyped()  # the most recently pressed key
-         # if the left arrow key has been pressed
-         if key_typed == "left":
-            # move the active tetromino left by one
-            current_tetromino.move(key_typed, grid)
-         # if the right arrow key has been pressed
-         elif key_typed == "right":
-            # move the active tetromino right by one
-            current_tetromino.move(key_typed, grid)
-         # if the down arrow key has been pressed
-         elif key_typed == "down":
-            # move the active tetromino down by one
-            # (soft drop: causes the tetromino to fall down faster)
-            current_tetromino.move(key_typed, grid)
-         elif key_typed == "up":
-             # Call the rotate method of the current tetromino
-             current_tetromino.rotate(grid)
-         elif keyboard.is_pressed('shift'):
-            # cause the active tetromino to hard drop
-            current_tetromino.hard_drop(grid)
-            # Process the landing of the tetromino immediately
-            process_landing(current_tetromino, grid)
-
-
-         # clear the queue of the pressed keys for a smoother interaction
-         stddraw.clearKeysTyped()
+      phase_start = profiler.start()
+      # check for any new user interaction
+      stddraw.pollEvents()
+      actions = input_handler.get_actions()
+      # the key typed queue is used only for the overlay key of the profiler
+      while stddraw.hasNextKeyTyped():
+         if stddraw.nextKeyTyped() == PROFILER_OVERLAY_KEY and profiler.enabled:
+            profiler.toggle_overlay()
+            next_overlay_time = 0
+            if not profiler.overlay_visible:
+               grid.invalidate_display()  # erase the overlay
 
       if stddraw.mousePressed():
           # get the coordinates of the most recent location at which the mouse
           # has been left-clicked
           mouse_x, mouse_y = stddraw.mouseX(), stddraw.mouseY()
-          # check if these coordinates are inside the button
+          # check if these coordinates are inside the restart button
           if mouse_x >= 15 and mouse_x <= 16 + 1:
               if mouse_y >= 18 and mouse_y <= 18 + 1:
-                  restart_state()
-
-      # move the active tetromino down by one at each iteration (auto fall)
-      success = current_tetromino.move("down", grid)
-      # lock the active tetromino onto the grid when it cannot go down anymore
-      if not success:
-         # get the tile matrix of the tetromino without empty rows and columns
-         # and the position of the bottom left cell in this matrix
-         tiles, pos = current_tetromino.get_min_bounded_tile_matrix(True)
-         # update the game grid by locking the tiles of the landed tetromino
-         game_over = grid.update_grid(tiles, pos)
-         # end the main game loop if the game is over
-         if game_over:
-            display_game_menu_over(grid_h, grid_w)
-
-         handle_free_tiles(grid)
-         merge_tiles(grid)  # Call merge function here
-         clear_full_rows(grid)
-         reset_merged_flags(grid)
-         # create the next tetromino to enter the game grid
-         # by using the create_tetromino function defined below
-         current_tetromino = create_tetromino()
-         grid.current_tetromino = current_tetromino
-
-      # display the game grid with the current tetromino
-      grid.display()
+                  # end the tick, so that it is not counted in the next game
+                  profiler.lap("input", phase_start)
+                  profiler.end_tick()
+                  return MENU
+      phase_start = profiler.lap("input", phase_start)
+
+      # apply the actions of the pressed keys in order, including the repeated
+      # moves of the held left, right and down (soft drop) arrow keys, the up
+      # arrow key rotates and the shift or space keys cause hard drops
+      for action in actions:
+         game.apply(action)
+         if action == "hard_drop":
+            # the new tetromino starts falling one interval from now
+            next_fall_time = time.perf_counter() + gravity_interval
+
+      # move the active tetromino down by one for each elapsed auto fall step
+      # (it is locked onto the grid when it cannot go down anymore)
+      while time.perf_counter() >= next_fall_time:
+         next_fall_time += gravity_interval
+         if game.tick():
+            # the new tetromino starts falling one interval from now
+            next_fall_time = time.perf_counter() + gravity_interval
+      profiler.lap("movement", phase_start)
+
+      # end the main game loop if the game is over
+      if game.game_over:
+         profiler.end_tick()
+         return GAME_OVER
+
+      # display the game grid with the current tetromino when a frame is due
+      now = time.perf_counter()
+      if now >= next_frame_time:
+         phase_start = profiler.start()
+         grid.display()
+         # update the overlay of the profiler a few times per second
+         if profiler.overlay_visible and now >= next_overlay_time:
+            profiler.draw_overlay(grid.get_layers()[0], overlay_region)
+            next_overlay_time = now + PROFILER_OVERLAY_INTERVAL
+         profiler.lap("display", phase_start)
+         # skip the missed frames instead of drawing them late
+         next_frame_time = max(next_frame_time + frame_interval, now)
+      profiler.end_tick()
+
+      # wait for a user interaction until the next auto fall step, frame or
+      # repeated move of a held key (the CPU is not used while waiting)
+      wait_time = min(next_fall_time, next_frame_time)
+      next_repeat_time = input_handler.get_next_repeat_time()
+      if next_repeat_time is not None:
+         wait_time = min(wait_time, next_repeat_time)
+      stddraw.waitForEvent(max(0.0, wait_time - time.perf_counter()))
 
-   # print a message on the console when the game is over
-
-# A function for creating random shaped tetrominoes to enter the game grid
-
-def create_tetromino():
-   # the type (shape) of the tetromino is determined randomly
-   tetromino_types = ['I', 'O', 'Z']
-   random_index = random.randint(0, len(tetromino_types) - 1)
-   random_type = tetromino_types[random_index]
-   # create and return the tetromino
-   tetromino = Tetromino(random_type)
-   return tetromino
 
 # A function for displaying a simple menu before starting the game
 def display_game_menu(grid_height, grid_width):
@@ -334,9 +244,9 @@ def display_game_menu(grid_height, grid_width):
    stddraw.text(img_center_x, 5, text_to_display)
    # the user interaction loop for the simple menu
 
+   # display the menu
+   stddraw.show(0)
    while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
       # check if the mouse has been left-clicked on the start game button
       if stddraw.mousePressed():
          # get the coordinates of the most recent location at which the mouse
@@ -346,6 +256,8 @@ def display_game_menu(grid_height, grid_width):
          if mouse_x >= button_blc_x and mouse_x <= button_blc_x + button_w:
             if mouse_y >= button_blc_y and mouse_y <= button_blc_y + button_h:
                break  # break the loop to end the method and start the game
+      # wait for the next user interaction without using the CPU
+      stddraw.waitForEvent()
 
 def display_game_menu_over(grid_height, grid_width):
    # the colors used for the menu
@@ -391,9 +303,9 @@ def display_game_menu_over(grid_height, grid_width):
    stddraw.text(img_center_x, 8, text_to_display)
 
    # the user interaction loop for the simple menu
+   # display the menu
+   stddraw.show(0)
    while True:
-      # display the menu and wait for a short time (50 ms)
-      stddraw.show(50)
       # check if the mouse has been left-clicked on the start game button
       if stddraw.mousePressed():
          # get the coordinates of the most recent location at which the mouse
@@ -402,130 +314,63 @@ def display_game_menu_over(grid_height, grid_width):
          # check if these coordinates are inside the button
          if mouse_x >= button_blc_x and mouse_x <= button_blc_x + button_w:
             if mouse_y >= button_blc_y and mouse_y <= button_blc_y + button_h:
-               gameover_state()
-
-
-def merge_tiles(grid):
-    # Indicates if we should keep checking for merges
-    continue_merging = True
-
-    while continue_merging:
-        continue_merging = False  # Assume no merge will happen (will set to True if a merge occurs)
+               break  # break the loop to end the method and go to the menu
+      # wait for the next user interaction without using the CPU
+      stddraw.waitForEvent()
 
-        # Loop through the grid to find merges
-        for col in range(grid.grid_width):
-            for row in range(grid.grid_height - 1, -1, -1):
-                current_tile = grid.tile_matrix[row][col]
-
-                # Only consider non-null tiles that haven't already merged
-                if current_tile and not current_tile.merged:
-                    # Check the tile above it
-                    above_row = row + 1
-                    while above_row < grid.grid_height:
-                        above_tile = grid.tile_matrix[above_row][col]
-                        if above_tile is None:
-                            # If the above tile is None, keep looking upwards
-                            above_row += 1
-                            continue
-
-                        # Found a non-null tile, check for merge possibility
-                        if above_tile.value == current_tile.value:
-                            # Merge tiles
-                            current_tile.value *= 2
-                            current_tile.color = current_tile.determine_color()
-                            grid.tile_matrix[above_row][col] = None  # Remove the merged above tile
-                            current_tile.merged = True  # Mark as merged
-                            grid.score += current_tile.value  # Update the score
-                            continue_merging = True  # A merge occurred, continue checking
-                        break  # Stop looking up if we find a non-matching tile or out of bounds
-
-    # Reset the merged flags for all tiles
-    for row in grid.tile_matrix:
-        for tile in row:
-            if tile:
-                tile.merged = False
 
 # start() function is specified as the entry point (main function) from which
 # the program starts execution
-def clear_full_rows(grid):
-   for row in range(grid.grid_height):
-      # Check if the row is full
-      if None not in grid.tile_matrix[row]:
-         grid.score += sum(tile.value for tile in grid.tile_matrix[row] if tile)  # Update the score
-         # Clear the row and move down the above tiles
-         for move_row in range(row, grid.grid_height - 1):
-            grid.tile_matrix[move_row] = grid.tile_matrix[move_row + 1]
-         grid.tile_matrix[grid.grid_height - 1] = [None] * grid.grid_width  # Empty the topmost row
-
-
-def reset_merged_flags(grid):
-   for row in grid.tile_matrix:
-      for tile in row:
-         if tile is not None:
-            tile.merged = False
-
-def handle_free_tiles(grid):
-    moved_or_merged = True  # Initialize to enter the loop
-    while moved_or_merged:
-        moved_or_merged = False  # Reset flag at the start of each pass
-
-        # First, allow all tiles to fall to their lowest possible positions
-        for col in range(grid.grid_width):
-            for row in range(1, grid.grid_height):  # Start from second row to bottom
-                current_tile = grid.tile_matrix[row][col]
-                if current_tile and grid.tile_matrix[row - 1][col] is None:
-                    # Move tile down
-                    grid.tile_matrix[row - 1][col] = current_tile
-                    grid.tile_matrix[row][col] = None
-                    moved_or_merged = True  # A tile has moved, so repeat the process
-
-        # Then, check for merges after all tiles have fallen
-        for col in range(grid.grid_width):
-            for row in range(grid.grid_height - 1, 0, -1):  # Bottom to top
-                current_tile = grid.tile_matrix[row][col]
-                below_tile = grid.tile_matrix[row - 1][col] if row > 0 else None
-                if current_tile and below_tile and current_tile.value == below_tile.value and not below_tile.merged:
-                    # Merge tiles
-                    below_tile.value *= 2
-                    below_tile.color = below_tile.determine_color()
-                    below_tile.merged = True
-                    grid.tile_matrix[row][col] = None  # Remove the merged tile
-                    grid.score += below_tile.value  # Update the score
-                    moved_or_merged = True  # A merge has happened, repeat the process
-
-        # Reset merged flags after each pass through the grid
-        for col in range(grid.grid_width):
-            for row in range(grid.grid_height):
-                if grid.tile_matrix[row][col]:
-                    grid.tile_matrix[row][col].merged = False
-
-
-# Make sure to call this function at the correct point in your game loop
-def try_merge(grid, row, col):
-    # This function tries to merge the current tile with the one below it, if possible
-    current_tile = grid.tile_matrix[row][col]
-    below_tile = grid.tile_matrix[row - 1][col] if row > 0 else None
-    # If the below tile exists and has the same value, merge them
-    if below_tile and current_tile.value == below_tile.value:
-        below_tile.value *= 2
-        below_tile.color = below_tile.determine_color()
-        grid.tile_matrix[row][col] = None
-        grid.score += below_tile.value  # Update the score
-        return True  # Indicate that a merge occurred
-    return False  # Indicate that no merge occurred
-
-
-def process_landing(tetromino, grid):
-    tiles, pos = tetromino.get_min_bounded_tile_matrix(True)
-    game_over = grid.update_grid(tiles, pos)
-    if not game_over:
-        merge_tiles(grid)
-        clear_full_rows(grid)
-        reset_merged_flags(grid)
-        # Create the next tetromino and set it as the current one
-        grid.current_tetromino = create_tetromino()
-
-    return True
-
 if __name__ == '__main__':
-   start()
+   parser = argparse.ArgumentParser(description="Tetris 2048")
+   parser.add_argument("--profile", nargs="?", const="profile.jsonl",
+                       metavar="TRACE_FILE",
+                       help="time the phases of the game loop (press F3 for "
+                            "the overlay) and write a JSONL trace at exit "
+                            "(profile.jsonl by default)")
+   parser.add_argument("--seed", type=int,
+                       help="the seed that the pieces of the games are "
+                            "generated from (random by default)")
+   parser.add_argument("--record", metavar="REPLAY_FILE",
+                       help="record the games played into REPLAY_FILE")
+   parser.add_argument("--replay", metavar="REPLAY_FILE",
+                       help="play back a game recorded in REPLAY_FILE")
+   parser.add_argument("--game", type=int, default=1,
+                       help="the number of the game to play back (1 for the "
+                            "first game in the file, -1 for the last one)")
+   parser.add_argument("--speed", type=float, default=1.0,
+                       help="the speed of the playback relative to the game "
+                            "(0 plays it back at full speed without "
+                            "displaying it)")
+   args = parser.parse_args()
+   if args.replay is not None:
+      try:
+         replays = load_replays(args.replay)
+      except (OSError, ValueError) as error:
+         parser.error("cannot read %s: %s" % (args.replay, error))
+      # an empty file is left by --record when no game is started
+      if not replays:
+         parser.error("no games are recorded in " + args.replay)
+      if args.game == 0 or abs(args.game) > len(replays):
+         parser.error("%s has %d game(s), so --game must be from 1 to %d or "
+                      "from -%d to -1" % (args.replay, len(replays),
+                                          len(replays), len(replays)))
+      game_replay = replays[args.game - 1 if args.game > 0 else args.game]
+      start_time = time.perf_counter()
+      if args.speed > 0:
+         game = run_replay(game_replay, args.speed)
+      else:
+         game = play_replay(game_replay)
+      print("score %d, %d tetrominoes, %d ticks, played back in %.1f ms" % (
+         game.score, game.pieces, game.ticks,
+         (time.perf_counter() - start_time) * 1000))
+      if args.speed > 0:
+         stddraw.show()  # keep displaying the end of the game
+   else:
+      profiler = None
+      if args.profile is not None:
+         profiler = PhaseProfiler(enabled=True, trace_file=args.profile)
+      replay_writer = None
+      if args.record is not None:
+         replay_writer = ReplayWriter(args.record)
+      start(profiler, args.seed, replay_writer)
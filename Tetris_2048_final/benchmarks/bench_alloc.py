@@ -0,0 +1,143 @@
+################################################################################
+#                                                                              #
+# Allocation benchmark of Tetris 2048                                          #
+#                                                                              #
+# Counts the Tile, Point and Color objects created for each landed tetromino   #
+# and for each displayed frame, and measures the memory used by one object of  #
+# each of these classes. Fewer and smaller objects mean fewer and shorter      #
+# garbage collection pauses in long sessions. Usage (from any directory):      #
+#                                                                              #
+#    python benchmarks/bench_alloc.py [--pieces N] [--seed S] [--no-display]   #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# display the frames without opening a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse  # used for parsing the command line arguments
+import random  # used for seeding the tetrominoes and choosing the moves
+import tracemalloc  # used for measuring the memory used by the objects
+from engine import GameEngine, ACTIONS  # the headless game engine
+from tile import Tile
+from point import Point
+from lib.color import Color
+
+# the classes whose objects are counted
+CLASSES = (Tile, Point, Color)
+
+
+# A class for counting the objects created from the given classes, including
+# the objects created by copying (copy.deepcopy does not call __init__)
+class InstanceCounter:
+
+   def __init__(self, classes):
+      self.classes = classes
+      self.counts = dict.fromkeys((cls.__name__ for cls in classes), 0)
+
+   def __enter__(self):
+      counts = self.counts
+
+      def counting_new(cls, *args, **kwargs):
+         counts[cls.__name__] += 1
+         return object.__new__(cls)
+
+      for cls in self.classes:
+         cls.__new__ = staticmethod(counting_new)
+      return self
+
+   def __exit__(self, *exc_info):
+      for cls in self.classes:
+         del cls.__new__
+
+   # A method that returns the counts and resets them to zero
+   def take(self):
+      counts = dict(self.counts)
+      for name in self.counts:
+         self.counts[name] = 0
+      return counts
+
+
+# A function that returns the number of bytes used by one object of the given
+# class (including its attribute dictionary if it has one)
+def bytes_per_object(create, n=10000):
+   tracemalloc.start()
+   before = tracemalloc.get_traced_memory()[0]
+   objects = [create() for i in range(n)]
+   after = tracemalloc.get_traced_memory()[0]
+   tracemalloc.stop()
+   # the list of the objects is not counted
+   return (after - before - sys.getsizeof(objects)) / n
+
+
+# A function that plays the game with random moves and returns the average
+# number of objects created per landed tetromino and per displayed frame
+def count_objects(pieces, seed, display):
+   random.seed(seed)
+   game = GameEngine(seed=seed)
+   if display:
+      import lib.stddraw as stddraw
+      stddraw.setCanvasSize(40 * 17, 40 * 20)
+      stddraw.setXscale(-0.5, 16.5)
+      stddraw.setYscale(-0.5, 19.5)
+      game.grid.display()  # the first frame draws everything
+   landing_counts = dict.fromkeys((cls.__name__ for cls in CLASSES), 0)
+   frame_counts = dict(landing_counts)
+   frames = 0
+   with InstanceCounter(CLASSES) as counter:
+      while game.pieces < pieces and not game.game_over:
+         counter.take()
+         landed = game.tick()
+         # move the tetromino randomly (a hard drop lands it)
+         action = random.choice(ACTIONS)
+         if not game.game_over and game.apply(action):
+            landed = landed or action == "hard_drop"
+         counts = counter.take()
+         if landed:
+            for name in counts:
+               landing_counts[name] += counts[name]
+         if display and not game.game_over:
+            game.grid.display()
+            frames += 1
+            for name, count in counter.take().items():
+               frame_counts[name] += count
+      landed_pieces = game.pieces
+   per_landing = {name: count / max(1, landed_pieces)
+                  for name, count in landing_counts.items()}
+   per_frame = {name: count / max(1, frames)
+                for name, count in frame_counts.items()}
+   return landed_pieces, per_landing, frames, per_frame
+
+
+def main():
+   parser = argparse.ArgumentParser(
+      description="Count the objects created by the game.")
+   parser.add_argument("--pieces", type=int, default=500,
+                       help="the number of tetrominoes to land")
+   parser.add_argument("--seed", type=int, default=2048,
+                       help="the seed of the random number generator")
+   parser.add_argument("--no-display", action="store_true",
+                       help="do not display the frames")
+   args = parser.parse_args()
+
+   print("bytes per object:")
+   for name, create in (("Tile", lambda: Tile(2)), ("Point", Point),
+                        ("Color", lambda: Color(1, 2, 3))):
+      print("   %-6s %6.1f" % (name, bytes_per_object(create)))
+
+   pieces, per_landing, frames, per_frame = count_objects(
+      args.pieces, args.seed, not args.no_display)
+   print("objects created per landing (%d landings):" % pieces)
+   for name, count in per_landing.items():
+      print("   %-6s %6.1f" % (name, count))
+   if frames:
+      print("objects created per frame (%d frames):" % frames)
+      for name, count in per_frame.items():
+         print("   %-6s %6.1f" % (name, count))
+
+
+if __name__ == "__main__":
+   main()
@@ -0,0 +1,225 @@
+################################################################################
+#                                                                              #
+# Frame time benchmark of the render path of Tetris 2048                       #
+#                                                                              #
+# Draws synthetic boards (empty, half full and full with mixed tile values)    #
+# without opening a window and reports the mean and the 99th percentile of the #
+# frame times and the number of calls of each stddraw function per frame for   #
+# each scenario below. Usage (from any directory):                             #
+#                                                                              #
+#    python benchmarks/bench_render.py [--frames N] [--output results.json]    #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# draw on a surface in memory instead of a window
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+import argparse  # used for parsing the command line arguments
+import json  # used for saving the results
+import platform  # used for describing the machine in the results
+import random  # used for choosing the changed cells
+import subprocess  # used for finding the current commit
+import time  # used for measuring the frame times
+import lib.stddraw as stddraw  # the drawing library
+from point import Point  # used for tile positions
+from boards import FILLS, make_grid, make_tetromino  # the synthetic boards
+
+# the dimensions of the game grid and the canvas used by the game
+GRID_H, GRID_W, EXTRA_SPACE, CELL_SIZE = 20, 12, 5, 40
+# the number of cells changed in each frame of the incremental scenario (the
+# old and the new cells of a moved tetromino)
+CHANGED_CELLS = 8
+# the stddraw functions whose calls are counted
+COUNTED_FUNCTIONS = (
+   "point", "line", "circle", "filledCircle", "rectangle", "filledRectangle",
+   "square", "filledSquare", "polygon", "filledPolygon", "text", "boldText",
+   "picture", "clear", "setPenColor", "setPenRadius", "setFontSize",
+   "drawLayer", "drawSprite", "drawSprites", "show", "showRegions",
+)
+
+
+# A function that sets up the canvas as the game does
+def setup_canvas():
+   stddraw.setCanvasSize(CELL_SIZE * (GRID_W + EXTRA_SPACE), CELL_SIZE * GRID_H)
+   stddraw.setXscale(-0.5, GRID_W + EXTRA_SPACE - 0.5)
+   stddraw.setYscale(-0.5, GRID_H - 0.5)
+
+
+# A function that creates the named board with a tetromino at the top when it
+# is not full
+def make_board(name, seed):
+   grid = make_grid(GRID_H, GRID_W, FILLS[name], seed)
+   if FILLS[name] < 1:
+      grid.current_tetromino = make_tetromino("Z", 0, GRID_H - 3)
+   return grid
+
+
+# The scenarios: each function draws a single frame of the given grid
+# (rng is used for choosing the cells changed between the frames)
+
+# displaying the whole grid, as in the first frame of a game
+def full_redraw(grid, rng):
+   grid.invalidate_display()
+   grid.display()
+
+
+# displaying the grid after a few of its cells have changed
+def incremental(grid, rng):
+   for i in range(CHANGED_CELLS):
+      row, col = rng.randrange(GRID_H), rng.randrange(GRID_W)
+      tile = grid.tile_matrix[row][col]
+      if tile is not None:
+         tile.value = 2 if tile.value >= 2048 else 2 * tile.value
+   # the game rules update the grid after changing its tiles (this is timed
+   # too, so the frame is measured as the frame after a landing)
+   grid.update_occupancy()
+   grid.display()
+
+
+# drawing each tile of the grid with Tile.draw
+def tile_draw(grid, rng):
+   for row in range(GRID_H):
+      for col in range(GRID_W):
+         if grid.tile_matrix[row][col] is not None:
+            grid.tile_matrix[row][col].draw(Point(col, row))
+   stddraw.show(0)
+
+
+# drawing each tile of the grid with the drawing primitives (Tile.render)
+def tile_render(grid, rng):
+   for row in range(GRID_H):
+      for col in range(GRID_W):
+         if grid.tile_matrix[row][col] is not None:
+            grid.tile_matrix[row][col].render(Point(col, row))
+   stddraw.show(0)
+
+
+SCENARIOS = {
+   "full_redraw": full_redraw,
+   "incremental": incremental,
+   "tile_draw": tile_draw,
+   "tile_render": tile_render,
+}
+
+
+# A class for counting the calls of the stddraw functions (the calls made by
+# other stddraw functions are counted too)
+class CallCounter:
+
+   def __init__(self, names=COUNTED_FUNCTIONS):
+      self.names = [name for name in names if hasattr(stddraw, name)]
+      self.counts = dict.fromkeys(self.names, 0)
+
+   def __enter__(self):
+      self.originals = {name: getattr(stddraw, name) for name in self.names}
+      for name, function in self.originals.items():
+         setattr(stddraw, name, self.counting(name, function))
+      return self
+
+   def __exit__(self, *exc_info):
+      for name, function in self.originals.items():
+         setattr(stddraw, name, function)
+
+   def counting(self, name, function):
+      def counting_function(*args, **kwargs):
+         self.counts[name] += 1
+         return function(*args, **kwargs)
+      return counting_function
+
+
+# A function that runs the given scenario on the named board and returns its
+# results (the frame times in milliseconds and the calls per frame)
+def run(board_name, scenario_name, frames, warmup, seed):
+   grid = make_board(board_name, seed)
+   draw = SCENARIOS[scenario_name]
+   rng = random.Random(seed)
+   # draw the first frame and fill the caches
+   grid.display()
+   for i in range(warmup):
+      draw(grid, rng)
+   # measure the frame times
+   times = []
+   for i in range(frames):
+      start = time.perf_counter()
+      draw(grid, rng)
+      times.append((time.perf_counter() - start) * 1000)
+   # count the calls in separate frames as counting slows down drawing
+   counted_frames = min(frames, 20)
+   with CallCounter() as counter:
+      for i in range(counted_frames):
+         draw(grid, rng)
+   calls = {name: count / counted_frames
+            for name, count in counter.counts.items() if count}
+   times.sort()
+   return {
+      "board": board_name,
+      "scenario": scenario_name,
+      "frames": frames,
+      "mean_ms": sum(times) / len(times),
+      "p99_ms": times[min(len(times) - 1, int(0.99 * len(times)))],
+      "calls_per_frame": calls,
+   }
+
+
+# A function that returns the current git commit of the repository (None when
+# it is not available)
+def current_commit():
+   try:
+      return subprocess.check_output(
+         ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+         cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+   except (OSError, subprocess.CalledProcessError):
+      return None
+
+
+def main():
+   parser = argparse.ArgumentParser(
+      description="Measure the frame times of the render path.")
+   parser.add_argument("--frames", type=int, default=200,
+                       help="the number of measured frames per scenario")
+   parser.add_argument("--warmup", type=int, default=10,
+                       help="the number of frames drawn before measuring")
+   parser.add_argument("--seed", type=int, default=2048,
+                       help="the seed of the synthetic boards")
+   parser.add_argument("--boards", nargs="+", default=list(FILLS),
+                       choices=list(FILLS), help="the boards to draw")
+   parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS),
+                       choices=list(SCENARIOS), help="the scenarios to run")
+   parser.add_argument("--output", help="the JSON file to save the results")
+   args = parser.parse_args()
+
+   setup_canvas()
+   results = []
+   print("%-6s %-12s %10s %10s  %s" % ("board", "scenario", "mean ms",
+                                       "p99 ms", "calls per frame"))
+   for board_name in args.boards:
+      for scenario_name in args.scenarios:
+         result = run(board_name, scenario_name, args.frames, args.warmup,
+                      args.seed)
+         results.append(result)
+         calls = ", ".join("%s %g" % item
+                           for item in result["calls_per_frame"].items())
+         print("%-6s %-12s %10.3f %10.3f  %s" % (
+            board_name, scenario_name, result["mean_ms"], result["p99_ms"],
+            calls))
+
+   if args.output:
+      report = {
+         "benchmark": "render",
+         "commit": current_commit(),
+         "python": platform.python_version(),
+         "machine": platform.platform(),
+         "seed": args.seed,
+         "results": results,
+      }
+      with open(args.output, "w") as file:
+         json.dump(report, file, indent=2)
+      print("results saved to", args.output)
+
+
+if __name__ == "__main__":
+   main()
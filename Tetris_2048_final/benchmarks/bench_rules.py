@@ -0,0 +1,222 @@
+################################################################################
+#                                                                              #
+# Throughput benchmark of the game rule kernels of Tetris 2048                 #
+#                                                                              #
+# Runs each kernel on seeded synthetic boards of several sizes in both storage #
+# modes of the game grid and reports the operations per second. The results   #
+# can be saved as a baseline and later runs compared against it, flagging the #
+# kernels that have become slower. Usage (from any directory):                 #
+#                                                                              #
+#    python benchmarks/bench_rules.py [--save-baseline FILE]                   #
+#    python benchmarks/bench_rules.py --baseline FILE [--tolerance 0.2]        #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse  # used for parsing the command line arguments
+import gc  # used for disabling the garbage collector while measuring
+import json  # used for saving and loading the baselines
+import platform  # used for describing the machine in the baselines
+import random  # used for choosing the tetromino positions
+import time  # used for measuring the kernels
+import engine  # the game rules
+from boards import make_grid, make_tetromino  # the synthetic boards
+from tile import Tile  # used for filling the rows to be cleared
+
+# the grid sizes as (width, height)
+SIZES = ((12, 20), (25, 50), (50, 100), (100, 400))
+# the storage modes of the game grid
+MODES = ("tile", "compact")
+# the boards of the rule kernels are half full with holes and small values,
+# so that there are tiles to fall and merge and full rows to clear
+FILL, HOLES, MAX_EXPONENT = 0.5, 0.2, 4
+# the number of the bottom rows that are full on the boards of clear_full_rows
+FULL_ROWS = 4
+
+
+# The kernels: each function takes a prepared board (a fresh copy for the
+# kernels that change it) and a random number generator and returns the
+# function to be measured
+
+def merge_tiles(grid, rng):
+   return lambda: engine.merge_tiles(grid)
+
+
+def handle_free_tiles(grid, rng):
+   return lambda: engine.handle_free_tiles(grid)
+
+
+def clear_full_rows(grid, rng):
+   _fill_rows(grid, range(FULL_ROWS))
+   return lambda: engine.clear_full_rows(grid)
+
+
+def lock_tetromino(grid, rng):
+   tetromino = _tetromino_above_stack(grid, rng)
+   return lambda: grid.lock_tetromino(tetromino)
+
+
+def can_be_moved(grid, rng):
+   tetromino = _tetromino_above_stack(grid, rng)
+   direction = rng.choice(("left", "right", "down"))
+   return lambda: tetromino.can_be_moved(direction, grid)
+
+
+def rotate(grid, rng):
+   tetromino = _tetromino_above_stack(grid, rng)
+   return lambda: tetromino.rotate(grid)
+
+
+def hard_drop(grid, rng):
+   tetromino = _tetromino_above_stack(grid, rng)
+   position = tetromino.bottom_left_cell
+   y = position.y
+
+   def drop():
+      position.y = y
+      tetromino.hard_drop(grid)
+   return drop
+
+
+# A function that fills the empty cells in the given rows of the grid with 2s
+def _fill_rows(grid, rows):
+   for row in rows:
+      for col in range(grid.grid_width):
+         if grid.compact and grid.exponent_matrix[row][col] == 0:
+            grid.exponent_matrix[row][col] = 1
+         elif not grid.compact and grid.tile_matrix[row][col] is None:
+            grid.tile_matrix[row][col] = Tile(2)
+   grid.update_occupancy()
+
+
+# A function that creates a tetromino with a random type, horizontal position
+# and rotation state a few rows above the highest tile of the grid
+def _tetromino_above_stack(grid, rng):
+   shape = rng.choice(("I", "O", "Z"))
+   x = rng.randint(0, grid.grid_width - 4)
+   y = min(grid.grid_height - 4, max(grid.column_heights) + 2)
+   return make_tetromino(shape, x, y, rng.randrange(4))
+
+
+# the kernels and whether they change the board (such kernels are measured on
+# a fresh copy of the board for each operation)
+KERNELS = {
+   "merge_tiles": (merge_tiles, True),
+   "handle_free_tiles": (handle_free_tiles, True),
+   "clear_full_rows": (clear_full_rows, True),
+   "lock_tetromino": (lock_tetromino, True),
+   "can_be_moved": (can_be_moved, False),
+   "rotate": (rotate, False),
+   "hard_drop": (hard_drop, False),
+}
+
+
+# A function that measures the given kernel on a board with the given size and
+# storage mode for at least min_time seconds and returns the operations/sec
+def measure(kernel_name, width, height, mode, seed, min_time):
+   prepare, changes_board = KERNELS[kernel_name]
+   board = make_grid(height, width, FILL, seed, mode == "compact", HOLES,
+                     MAX_EXPONENT)
+   rng = random.Random(seed)
+   operation = None if changes_board else prepare(board, rng)
+   elapsed, operations = 0.0, 0
+   start_time = time.perf_counter()
+   # the garbage collector is disabled while measuring (as timeit does), so
+   # that a collection of the garbage of the copied boards is not measured
+   gc_enabled = gc.isenabled()
+   gc.disable()
+   try:
+      # run at least 3 operations and at least min_time seconds in total (the
+      # preparation of the fresh boards is not measured)
+      while operations < 3 or time.perf_counter() - start_time < min_time:
+         if changes_board:
+            operation = prepare(board.copy(), rng)
+            batch = 1
+         else:
+            batch = 100
+         start = time.perf_counter()
+         for i in range(batch):
+            operation()
+         elapsed += time.perf_counter() - start
+         operations += batch
+   finally:
+      if gc_enabled:
+         gc.enable()
+   return operations / elapsed
+
+
+# A function that returns the key of a result in the baselines
+def result_key(kernel_name, width, height, mode):
+   return "%s/%dx%d/%s" % (kernel_name, width, height, mode)
+
+
+def main():
+   parser = argparse.ArgumentParser(
+      description="Measure the throughput of the game rule kernels.")
+   parser.add_argument("--kernels", nargs="+", default=list(KERNELS),
+                       choices=list(KERNELS), help="the kernels to measure")
+   parser.add_argument("--sizes", nargs="+", default=None,
+                       help="the grid sizes as WIDTHxHEIGHT (e.g. 12x20)")
+   parser.add_argument("--modes", nargs="+", default=list(MODES),
+                       choices=list(MODES), help="the storage modes")
+   parser.add_argument("--seed", type=int, default=2048,
+                       help="the seed of the synthetic boards")
+   parser.add_argument("--min-time", type=float, default=0.2,
+                       help="the minimum time to measure each kernel (s)")
+   parser.add_argument("--save-baseline", metavar="FILE",
+                       help="save the results as a baseline to FILE")
+   parser.add_argument("--baseline", metavar="FILE",
+                       help="compare the results with the baseline in FILE")
+   parser.add_argument("--tolerance", type=float, default=0.2,
+                       help="the slowdown ratio flagged as a regression")
+   args = parser.parse_args()
+
+   sizes = SIZES
+   if args.sizes:
+      sizes = [tuple(int(n) for n in size.split("x")) for size in args.sizes]
+   baseline = None
+   if args.baseline:
+      with open(args.baseline) as file:
+         baseline = json.load(file)["results"]
+
+   results, regressions = {}, []
+   print("%-18s %-9s %-8s %14s %10s" % ("kernel", "size", "mode",
+                                        "ops/sec", "vs base"))
+   for kernel_name in args.kernels:
+      for width, height in sizes:
+         for mode in args.modes:
+            ops = measure(kernel_name, width, height, mode, args.seed,
+                          args.min_time)
+            key = result_key(kernel_name, width, height, mode)
+            results[key] = ops
+            comparison = ""
+            if baseline is not None and key in baseline:
+               ratio = ops / baseline[key]
+               comparison = "%9.2fx" % ratio
+               if ratio < 1 - args.tolerance:
+                  comparison += "  REGRESSION"
+                  regressions.append(key)
+            print("%-18s %-9s %-8s %14.1f %10s" % (
+               kernel_name, "%dx%d" % (width, height), mode, ops, comparison))
+
+   if args.save_baseline:
+      with open(args.save_baseline, "w") as file:
+         json.dump({"python": platform.python_version(),
+                    "machine": platform.platform(),
+                    "seed": args.seed,
+                    "results": results}, file, indent=2)
+      print("baseline saved to", args.save_baseline)
+   if regressions:
+      print("%d regression(s) beyond the tolerance of %g:" % (
+         len(regressions), args.tolerance))
+      for key in regressions:
+         print("   " + key)
+      sys.exit(1)
+
+
+if __name__ == "__main__":
+   main()
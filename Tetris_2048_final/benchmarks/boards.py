@@ -0,0 +1,63 @@
+################################################################################
+#                                                                              #
+# Seeded synthetic boards for the benchmarks of Tetris 2048                    #
+#                                                                              #
+# The same arguments always give the same board, so the numbers measured on    #
+# different commits or machines can be compared.                               #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random  # used for generating the boards with a given seed
+from game_grid import GameGrid  # the class for modeling the game grid
+from tetromino import Tetromino  # the class for modeling the tetrominoes
+from tile import Tile  # the class for modeling the tiles
+
+# the fill ratios of the named boards
+FILLS = {"empty": 0.0, "half": 0.5, "full": 1.0}
+
+
+# A function that creates a game grid with the given dimensions whose columns
+# are filled up to about fill * grid_h rows (exactly when fill is 0 or 1) with
+# tiles of mixed values from 2 to 2 ** max_exponent, leaving each cell below
+# the top of its column empty with the probability holes
+def make_grid(grid_h, grid_w, fill, seed, compact=False, holes=0.0,
+              max_exponent=11):
+   rng = random.Random(seed)
+   # the tetrominoes use the dimensions of the game grid
+   Tetromino.grid_height, Tetromino.grid_width = grid_h, grid_w
+   grid = GameGrid(grid_h, grid_w, 5, compact)
+   for col in range(grid_w):
+      height = round(fill * grid_h)
+      if 0 < fill < 1:
+         # vary the heights of the columns by up to a tenth of the grid height
+         spread = max(1, grid_h // 10)
+         height = min(grid_h, max(0, height + rng.randint(-spread, spread)))
+      for row in range(height):
+         if holes and rng.random() < holes:
+            continue
+         exponent = rng.randint(1, max_exponent)
+         if compact:
+            grid.exponent_matrix[row][col] = exponent
+         else:
+            grid.tile_matrix[row][col] = Tile(1 << exponent)
+   grid.update_occupancy()
+   return grid
+
+
+# A function that creates a tetromino with the given type, position of the
+# bottom left cell, rotation state and tile value (the grid dimensions must be
+# set first, e.g. by make_grid)
+def make_tetromino(shape, x, y, rotation=0, value=2):
+   tetromino = Tetromino(shape)
+   tetromino.bottom_left_cell.x = x
+   tetromino.bottom_left_cell.y = y
+   tetromino.rotation = rotation
+   for tile in tetromino.tiles:
+      tile.value = value
+      tile.color = tile.determine_color()
+   return tetromino
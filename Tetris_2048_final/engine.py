@@ -0,0 +1,293 @@
+################################################################################
+#                                                                              #
+# The headless game engine of Tetris 2048                                      #
+#                                                                              #
+# The game rules (locking, free tile gravity, merging and row clearing) live   #
+# in this module so that they can be run without drawing anything. Neither    #
+# pygame nor keyboard is imported here, which allows simulating thousands of  #
+# tetrominoes per second for testing, bots and batch analysis.                #
+#                                                                              #
+################################################################################
+
+from game_grid import GameGrid  # the class for modeling the game grid
+from tetromino import Tetromino  # the class for modeling the tetrominoes
+from profiler import PhaseProfiler  # used for timing the landing stages
+# used for generating the pieces from a seeded random number stream
+from piece_generator import PieceGenerator
+import random  # used for creating tetrominoes with random types (shapes)
+import numpy as np  # fundamental Python module for scientific computing
+
+# the actions that can be given to the step method of the GameEngine class
+ACTIONS = ("left", "right", "down", "rotate", "hard_drop")
+
+# the profiler used when no profiler is given (it is disabled)
+DISABLED_PROFILER = PhaseProfiler()
+
+
+# A class for simulating the game without displaying it
+class GameEngine:
+
+   # A constructor for creating a new game with the given grid dimensions
+   # (see the GameGrid class for the compact storage mode of the locked tiles)
+   # and the profiler used for timing the landing stages (if any). The pieces
+   # are generated with the given seed (a random one when it is None) unless
+   # a piece generator is given, so the same seed gives the same game for the
+   # same actions.
+   def __init__(self, grid_h=20, grid_w=12, extra_space=5, compact=False,
+                profiler=None, seed=None, generator=None):
+      # set the game grid dimension values stored and used in the Tetromino class
+      Tetromino.grid_height = grid_h
+      Tetromino.grid_width = grid_w
+      # create the game grid
+      self.grid = GameGrid(grid_h, grid_w, extra_space, compact)
+      self.profiler = profiler
+      if generator is None:
+         generator = PieceGenerator(seed)
+      self.generator = generator
+      # the replay that records the applied actions (see replay.py), if any
+      self.recorder = None
+      # the number of auto fall steps and the number of landed tetrominoes
+      self.ticks = 0
+      self.pieces = 0
+      # create the first tetromino to enter the game grid
+      self.spawn_tetromino()
+
+   # A property for the tetromino that is currently being moved on the grid
+   @property
+   def current_tetromino(self):
+      return self.grid.current_tetromino
+
+   # A property that shows whether the game is over or not
+   @property
+   def game_over(self):
+      return self.grid.game_over
+
+   # A property for the seed of the pieces of the game
+   @property
+   def seed(self):
+      return self.generator.seed
+
+   # A property for the score of the game
+   @property
+   def score(self):
+      return self.grid.score
+
+   # A method for creating the next tetromino to enter the game grid
+   def spawn_tetromino(self):
+      self.grid.current_tetromino = create_tetromino(self.generator)
+      return self.grid.current_tetromino
+
+   # A method that applies the given action (see ACTIONS) to the current
+   # tetromino and returns True when the tetromino moves or rotates
+   def apply(self, action):
+      tetromino = self.grid.current_tetromino
+      if self.grid.game_over or tetromino is None:
+         return False
+      if action in ("left", "right", "down"):
+         applied = tetromino.move(action, self.grid)
+      elif action == "rotate":
+         applied = tetromino.rotate(self.grid)
+      elif action == "hard_drop":
+         # drop the tetromino to its landing position and lock it immediately
+         tetromino.hard_drop(self.grid)
+         self.land()
+         applied = True
+      else:
+         raise ValueError("unknown action: " + str(action))
+      # record the actions that change the game (the others have no effect)
+      if applied and self.recorder is not None:
+         self.recorder.record(self.ticks, action)
+      return applied
+
+   # A method that moves the current tetromino down by one (auto fall) and
+   # lands it when it cannot go down anymore (returns True when it lands)
+   def tick(self):
+      if self.grid.game_over:
+         return False
+      self.ticks += 1
+      if self.grid.current_tetromino.move("down", self.grid):
+         return False
+      self.land()
+      return True
+
+   # A method that applies the given action (if any) and then advances the
+   # game by one auto fall step (returns True when the game is over)
+   def step(self, action=None):
+      if action is not None:
+         self.apply(action)
+      self.tick()
+      return self.grid.game_over
+
+   # A method that locks the current tetromino onto the game grid, applies the
+   # game rules and creates the next tetromino unless the game is over
+   def land(self):
+      game_over = land_tetromino(self.grid.current_tetromino, self.grid,
+                                 self.profiler)
+      self.pieces += 1
+      if not game_over:
+         self.spawn_tetromino()
+      return game_over
+
+
+# A function for creating random shaped tetrominoes to enter the game grid
+# (their types, positions and tile values come from the given piece generator
+# if any, and from the random module otherwise)
+def create_tetromino(generator=None):
+   if generator is not None:
+      shape, x, values = generator.next_piece(Tetromino.grid_width)
+      return Tetromino(shape, x, values)
+   # the type (shape) of the tetromino is determined randomly
+   tetromino_types = ['I', 'O', 'Z']
+   random_index = random.randint(0, len(tetromino_types) - 1)
+   random_type = tetromino_types[random_index]
+   # create and return the tetromino
+   tetromino = Tetromino(random_type)
+   return tetromino
+
+
+# A function that locks the tiles of a landed tetromino onto the game grid and
+# applies the game rules (returns True when the game is over), timing each
+# stage with the given profiler (see profiler.py) if any
+def land_tetromino(tetromino, grid, profiler=None):
+   if profiler is None:
+      profiler = DISABLED_PROFILER
+   start = profiler.start()
+   # update the game grid by moving the tiles of the landed tetromino onto it
+   grid.lock_tetromino(tetromino)
+   game_over = grid.game_over
+   start = profiler.lap("landing.lock", start)
+   handle_free_tiles(grid)
+   start = profiler.lap("landing.free_tiles", start)
+   merge_tiles(grid)
+   start = profiler.lap("landing.merge", start)
+   clear_full_rows(grid)
+   profiler.lap("landing.clear_rows", start)
+   return game_over
+
+
+# A function that merges each tile with the first tile above it (skipping the
+# empty cells) when they have the same value, in a single pass over every
+# column from the topmost row downwards so that a merged tile can merge again
+# with the tile below it (returns the score gained and the merge events as
+# (row, col, merged_value) tuples)
+def merge_tiles(grid):
+   if grid.compact:
+      score_delta, events = _merge_columns_compact(grid)
+   else:
+      score_delta, events = _merge_columns(grid)
+   grid.score += score_delta  # Update the score
+   grid.update_occupancy()  # Merged tiles are removed from the grid
+   return score_delta, events
+
+
+# A function that removes all full rows at once and moves the rows above them
+# down (returns the score gained and the indexes of the cleared rows)
+def clear_full_rows(grid):
+   board = grid.exponent_matrix if grid.compact else grid.tile_matrix
+   # find all full rows with a single reduction over the board
+   if grid.compact:
+      full = (board != 0).all(axis=1)
+   else:
+      full = np.not_equal(board, None).all(axis=1)
+   cleared_rows = np.flatnonzero(full).tolist()
+   if not cleared_rows:
+      return 0, cleared_rows
+   # the score is the sum of the values of the tiles in the cleared rows
+   if grid.compact:
+      score_delta = sum(1 << int(exponent) for exponent in board[full].flat)
+   else:
+      score_delta = sum(tile.value for tile in board[full].flat)
+   grid.score += score_delta  # Update the score
+   # move the remaining rows down in one step (boolean indexing copies them,
+   # so no row of the board is shared) and empty the rows at the top
+   remaining = board[~full]
+   board[:len(remaining)] = remaining
+   board[len(remaining):] = 0 if grid.compact else None
+   grid.update_occupancy()  # Keep the row bitmasks in sync with the board
+   return score_delta, cleared_rows
+
+
+# A function that lets the tiles fall to their lowest possible positions in
+# their columns and then merges the tiles with the same values as the tiles
+# below them, repeating until nothing moves (returns the changed columns)
+def handle_free_tiles(grid):
+   board = grid.exponent_matrix if grid.compact else grid.tile_matrix
+   changed = np.zeros(grid.grid_width, dtype=bool)
+   while True:
+      # first, allow all tiles to fall at once by compacting each column
+      changed |= _compact_columns(board)
+      # then, check for merges after all tiles have fallen (a merge leaves a
+      # gap in its column, so the tiles must fall again after merges)
+      if grid.compact:
+         score_delta, events = _merge_columns_compact(grid)
+      else:
+         score_delta, events = _merge_columns(grid)
+      if not events:
+         break
+      grid.score += score_delta  # Update the score
+      changed[[col for row, col, value in events]] = True
+   grid.update_occupancy()  # Tiles have moved, so recompute the row bitmasks
+   return np.flatnonzero(changed).tolist()
+
+
+# A function that moves the tiles in each column of the given board (a tile
+# matrix or an exponent matrix) down to the bottom of the column without
+# changing their order, and returns a boolean array of the moved columns
+def _compact_columns(board):
+   if board.dtype == object:
+      empty = np.equal(board, None)
+   else:
+      empty = board == 0
+   # a stable sort of each column by emptiness keeps the order of the tiles
+   order = np.argsort(empty, axis=0, kind="stable")
+   moved = np.any(order != np.arange(len(board))[:, None], axis=0)
+   if moved.any():
+      board[:] = np.take_along_axis(board, order, axis=0)
+   return moved
+
+
+# A function that merges the tiles in each column of a tile matrix by scanning
+# the column once from the topmost row downwards (each tile absorbs the first
+# tile above it when they have the same value)
+def _merge_columns(grid):
+   score_delta, events = 0, []
+   for col in range(grid.grid_width):
+      # the first tile above the current row and its row index
+      above_tile, above_row = None, None
+      for row in range(grid.grid_height - 1, -1, -1):
+         current_tile = grid.tile_matrix[row][col]
+         if current_tile is None:
+            continue
+         if above_tile is not None and above_tile.value == current_tile.value:
+            # merge the above tile into the current tile
+            current_tile.value *= 2
+            current_tile.color = current_tile.determine_color()
+            grid.tile_matrix[above_row][col] = None
+            score_delta += current_tile.value
+            events.append((row, col, current_tile.value))
+         above_tile, above_row = current_tile, row
+   return score_delta, events
+
+
+# A function that applies the same merges as _merge_columns to an exponent
+# matrix by scanning the packed exponents of each column once as plain ints
+# (only the cells changed by the merges are written back to the matrix)
+def _merge_columns_compact(grid):
+   board = grid.exponent_matrix
+   score_delta, events = 0, []
+   for col, column in enumerate(board.T.tolist()):
+      # the rows of the tiles in the column from the topmost row downwards
+      rows = [row for row in range(grid.grid_height - 1, -1, -1) if column[row]]
+      # the first tile above the current row and its row index
+      above_exponent, above_row = 0, None
+      for row in rows:
+         exponent = column[row]
+         if exponent == above_exponent:
+            # merge the above tile into the current tile
+            exponent += 1
+            board[row, col] = exponent
+            board[above_row, col] = 0
+            score_delta += 1 << exponent
+            events.append((row, col, 1 << exponent))
+         above_exponent, above_row = exponent, row
+   return score_delta, events
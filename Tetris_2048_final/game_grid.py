@@ -1,23 +1,51 @@
-import lib.stddraw as stddraw  # used for displaying the game grid
-from lib.picture import Picture # used for `Picture` from `lib.picture` module.
+from lazy_module import LazyModule  # used for importing pygame only if needed
+stddraw = LazyModule("lib.stddraw")  # used for displaying the game grid
+picture = LazyModule("lib.picture")  # used for displaying the restart button
 from lib.color import Color  # used for coloring the game grid
-from point import Point  # used for tile positions
+from tile import get_sprite  # used for drawing the tiles on the game grid
+import copy as cp  # the copy module is used for copying the game grid
 import numpy as np  # fundamental Python module for scientific computing
 import os # used for os lib functions.
+
+# the drawn background layers of the game grids (the empty cells, the grid
+# lines and the restart button) and boundary layers cached by the canvas size,
+# the grid dimensions and the colors, so that they are drawn only once
+_layer_cache = {}
+
 # A class for modeling the game grid
 
 
 class GameGrid:
 
    # A constructor for creating the game grid based on the given arguments
-   def __init__(self, grid_h, grid_w, extra_space):
+   # (when compact is True, the locked tiles are stored as the base 2 logarithm
+   # of their values in a uint8 matrix where 0 denotes an empty cell and Tile
+   # objects are created only for drawing them)
+   def __init__(self, grid_h, grid_w, extra_space, compact=False):
       # set the dimensions of the game grid as the given arguments
       self.grid_height = grid_h
       self.grid_width = grid_w
       self.extraspace = extra_space
+      self.compact = compact
 
       # create a tile matrix to store the tiles locked on the game grid
-      self.tile_matrix = np.full((grid_h, grid_w), None)
+      # (or an exponent matrix in the compact storage mode)
+      if compact:
+         self.tile_matrix = None
+         self.exponent_matrix = np.zeros((grid_h, grid_w), dtype=np.uint8)
+      else:
+         self.tile_matrix = np.full((grid_h, grid_w), None)
+         self.exponent_matrix = None
+      # the exponents of the values of the locked tiles in the tile matrix (see
+      # get_exponent_matrix), which are computed again only after the tiles
+      # change (None when they have changed or in the compact storage mode)
+      self.exponent_mirror = None
+      # the occupancy of each row as an integer bitmask (bit c is set when the
+      # cell in column c is occupied) used for fast collision checks
+      self.row_masks = [0] * grid_h
+      # the skyline of the grid as the number of rows up to and including the
+      # highest occupied cell in each column (0 for an empty column)
+      self.column_heights = [0] * grid_w
 
       # create the tetromino that is currently being moved on the game grid
       self.current_tetromino = None
@@ -36,34 +64,97 @@ class GameGrid:
       self.line_thickness = 0.002
       self.box_thickness = 10 * self.line_thickness
       self.score = 0
+      # the cells displayed in the last frame (see the display method)
+      self.displayed_cells = None
 
 
-   # A method for displaying the game grid
+   # A method for displaying the game grid (only the cells that have changed
+   # since the last displayed frame are redrawn after the first frame)
    def display(self):
-      # clear the background to empty_cell_color
-      stddraw.clear(self.empty_cell_color)
-      # draw the game grid
+      background, boundaries = self.get_layers()
+      cells = self.get_displayed_cells()
+      if self.displayed_cells is not None:
+         # the changed cells: the old and the new cells of the tetromino and
+         # the cells changed by locking, merging, falling and clearing rows
+         changed = np.argwhere(cells != self.displayed_cells).tolist()
+         # the squares of the changed cells on the canvas
+         regions = [(col - 0.5, row - 0.5, 1, 1) for row, col in changed]
+         for region in regions:
+            stddraw.drawLayer(background, *region)
+         stddraw.drawSprites([(get_sprite(1 << int(cells[row][col])), col, row)
+                              for row, col in changed if cells[row][col] != 0])
+         for region in regions:
+            stddraw.drawLayer(boundaries, *region)
+         # update only the changed parts of the window
+         stddraw.showRegions(regions)
+         self.displayed_cells = cells
+         return
+      self.displayed_cells = cells
+      # draw the empty cells, the grid lines and the restart button at once
+      stddraw.drawLayer(background)
+      # draw the tiles locked on the game grid
       self.draw_grid()
       # draw the current/active tetromino if it is not None
       # (the case when the game grid is updated)
       if self.current_tetromino is not None:
          self.current_tetromino.draw()
       # draw a box around the game grid
-      self.draw_boundaries()
-      # show the resulting drawing with a pause duration = 250 ms
-      stddraw.show(250)
+      stddraw.drawLayer(boundaries)
+      # show the resulting drawing without a pause (the game loop decides when
+      # the next frame is displayed)
+      stddraw.show(0)
+
 
+   # A method that makes the next call of the display method redraw the whole
+   # canvas (e.g. after something else has been drawn on the canvas)
+   def invalidate_display(self):
+      self.displayed_cells = None
+
+
+   # A method that returns the exponents (base 2 logarithms) of the values of
+   # the tiles displayed in each cell, including the tiles of the tetromino
+   def get_displayed_cells(self):
+      cells = self.get_exponent_matrix().copy()
+      if self.current_tetromino is not None:
+         for x, y, tile in self.current_tetromino.get_tile_positions():
+            if 0 <= y < self.grid_height:
+               cells[y][x] = tile.value.bit_length() - 1
+      return cells
 
-   # A method for drawing the cells and the lines of the game grid
+
+   # A method for drawing the tiles locked on the game grid
    def draw_grid(self):
-      # for each cell of the game grid
-      for row in range(self.grid_height):
-         for col in range(self.grid_width):
-            # if the current grid cell is occupied by a tile
-            if self.tile_matrix[row][col] is not None:
-               # draw this tile
-               self.tile_matrix[row][col].draw(Point(col, row))
-      # draw the inner lines of the game grid
+      # draw the pre-rendered image of each tile on the grid at once
+      exponents = self.get_exponent_matrix()
+      stddraw.drawSprites([(get_sprite(1 << int(exponents[row][col])), col, row)
+                           for row, col in np.argwhere(exponents).tolist()])
+
+
+   # A method that returns the background and the boundary layers of the game
+   # grid, drawing them only when they are not cached yet
+   def get_layers(self):
+      key = (stddraw.getCanvasSize(), self.grid_height, self.grid_width,
+             self.extraspace, str(self.empty_cell_color), str(self.line_color),
+             str(self.boundary_color), self.line_thickness, self.box_thickness)
+      if key not in _layer_cache:
+         # the background: empty cells, the inner grid lines and the restart
+         # button
+         stddraw.startLayer()
+         stddraw.clear(self.empty_cell_color)
+         self.draw_grid_lines()
+         self.draw_restart_button()
+         background = stddraw.endLayer()
+         # a transparent layer with the box around the game grid (drawn after
+         # the tiles as it covers the outer half of the border tiles)
+         stddraw.startLayer(transparent=True)
+         self.draw_boundaries()
+         boundaries = stddraw.endLayer()
+         _layer_cache[key] = background, boundaries
+      return _layer_cache[key]
+
+
+   # A method for drawing the inner lines of the game grid
+   def draw_grid_lines(self):
       stddraw.setPenColor(self.line_color)
       stddraw.setPenRadius(self.line_thickness)
       # x and y ranges for the game grid
@@ -75,14 +166,16 @@ class GameGrid:
       for y in np.arange(start_y + 1, end_y, 1):  # horizontal inner lines
          stddraw.line(start_x, y, end_x, y)
       stddraw.setPenRadius()  # reset the pen radius to its default value
+
+
+   # A method for drawing the restart button on the right of the game grid
+   def draw_restart_button(self):
       current_dir = os.path.dirname(os.path.realpath(__file__))
       restart_image_file = current_dir + "/images/pngwing.com.png"
       restart_image_x = self.grid_width + 5 - 1.5  # 1.5 units from the right edge
       restart_image_y = self.grid_height - 1.5  # 1.5 units from the top edge
-      restart_image = Picture(restart_image_file)
+      restart_image = picture.Picture(restart_image_file)
       stddraw.picture(restart_image, restart_image_x, restart_image_y)
-      restart_button_w, restart_button_h = 1, 1
-      restart_button_blc_x, restart_button_blc_y = restart_image_x - restart_button_w/2 , 18
 
 
    # A method for drawing the boundaries around the game grid
@@ -105,8 +198,8 @@ class GameGrid:
       # have tiles with position.y >= grid_height
       if not self.is_inside(row, col):
          return False  # the cell is not occupied as it is outside the grid
-      # the cell is occupied by a tile if it is not None
-      return self.tile_matrix[row][col] is not None
+      # the cell is occupied by a tile if its bit in the row mask is set
+      return (self.row_masks[row] >> col) & 1 == 1
 
 
    # A method for checking whether the cell with the given row and col indexes
@@ -119,26 +212,83 @@ class GameGrid:
       return True
 
 
-   # A method that locks the tiles of a landed tetromino on the grid checking
-   # if the game is over due to having any tile above the topmost grid row.
-   # (This method returns True when the game is over and False otherwise.)
-   def update_grid(self, tiles_to_lock, blc_position):
+   # A method that locks the tiles of a landed tetromino on the grid by moving
+   # them straight from the cells of its rotation state (the tiles are not
+   # copied as the landed tetromino is not used anymore). It sets game_over
+   # when any tile is above the topmost grid row and returns the indexes of
+   # the rows and the columns in which tiles are locked.
+   def lock_tetromino(self, tetromino):
       # necessary for the display method to stop displaying the tetromino
       self.current_tetromino = None
-      # lock the tiles of the current tetromino (tiles_to_lock) on the grid
-      n_rows, n_cols = len(tiles_to_lock), len(tiles_to_lock[0])
-      for col in range(n_cols):
-         for row in range(n_rows):
-            # place each tile (occupied cell) onto the game grid
-            if tiles_to_lock[row][col] is not None:
-               # compute the position of the tile on the game grid
-               pos = Point()
-               pos.x = blc_position.x + col
-               pos.y = blc_position.y + (n_rows - 1) - row
-               if self.is_inside(pos.y, pos.x):
-                  self.tile_matrix[pos.y][pos.x] = tiles_to_lock[row][col]
-               # the game is over if any placed tile is above the game grid
-               else:
-                  self.game_over = True
-      # return the value of the game_over flag
-      return self.game_over
+      rows, cols = set(), set()
+      for x, y, tile in tetromino.get_tile_positions():
+         if self.is_inside(y, x):
+            if self.compact:
+               self.exponent_matrix[y][x] = tile.value.bit_length() - 1
+            else:
+               self.tile_matrix[y][x] = tile
+               self.exponent_mirror = None
+            self.row_masks[y] |= 1 << x
+            if y >= self.column_heights[x]:
+               self.column_heights[x] = y + 1
+            rows.add(y)
+            cols.add(x)
+         # the game is over if any placed tile is above the game grid
+         else:
+            self.game_over = True
+      return sorted(rows), sorted(cols)
+
+
+   # A method that recomputes the row bitmasks and the column heights from the
+   # tile matrix (it must be called after the tiles are moved or merged by the
+   # game rules)
+   def update_occupancy(self):
+      if self.compact:
+         occupied = self.exponent_matrix != 0
+      else:
+         occupied = np.not_equal(self.tile_matrix, None)
+         self.exponent_mirror = None  # the tiles have changed
+      # pack each row into bytes with the bit of column 0 as the lowest bit
+      packed = np.packbits(occupied, axis=1, bitorder="little")
+      self.row_masks = [int.from_bytes(row.tobytes(), "little") for row in packed]
+      # the highest occupied row of each column is found from the top
+      highest = self.grid_height - np.argmax(occupied[::-1], axis=0)
+      self.column_heights = np.where(occupied.any(axis=0), highest, 0).tolist()
+
+
+   # A method that returns the base 2 logarithms of the values of the locked
+   # tiles as a uint8 matrix (0 denotes an empty cell), which must not be
+   # changed by the caller
+   def get_exponent_matrix(self):
+      if self.compact:
+         return self.exponent_matrix
+      if self.exponent_mirror is None:
+         # read the values of the occupied cells only (the tile values are
+         # powers of 2, so their base 2 logarithms are exact)
+         occupied = np.not_equal(self.tile_matrix, None)
+         values = [tile.value for tile in self.tile_matrix[occupied].tolist()]
+         self.exponent_mirror = np.zeros(occupied.shape, dtype=np.uint8)
+         self.exponent_mirror[occupied] = np.log2(values)
+      return self.exponent_mirror
+
+
+   # A method that returns the locked tiles as bytes that can be hashed or
+   # compared for finding identical boards
+   def get_board_key(self):
+      return self.get_exponent_matrix().tobytes()
+
+
+   # A method that returns an independent copy of this game grid
+   def copy(self):
+      grid_copy = cp.copy(self)
+      grid_copy.row_masks = list(self.row_masks)
+      grid_copy.column_heights = list(self.column_heights)
+      if self.compact:
+         # copying the compact storage is a single copy of a contiguous array
+         grid_copy.exponent_matrix = self.exponent_matrix.copy()
+      else:
+         grid_copy.tile_matrix = cp.deepcopy(self.tile_matrix)
+         grid_copy.exponent_mirror = None
+      grid_copy.current_tetromino = cp.deepcopy(self.current_tetromino)
+      grid_copy.displayed_cells = None
+      return grid_copy
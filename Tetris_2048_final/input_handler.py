@@ -0,0 +1,77 @@
+import lib.stddraw as stddraw  # used for getting the key presses and releases
+import time  # used for timing the repeated moves of the held keys
+
+# the delayed auto shift (DAS: the time a key must be held down before its
+# action starts repeating) and the auto repeat rate (ARR: the time between two
+# repeats of the action) in seconds
+DAS = 0.17
+ARR = 0.05
+
+# the actions (see the ACTIONS of the game engine) of the keys given by their
+# names in stddraw (the shift keys and the space key cause hard drops)
+KEY_ACTIONS = {
+   "left": "left",
+   "right": "right",
+   "down": "down",
+   "up": "rotate",
+   "left shift": "hard_drop",
+   "right shift": "hard_drop",
+   "space": "hard_drop",
+}
+
+# the actions that are repeated while their keys are held down
+REPEATED_ACTIONS = ("left", "right", "down")
+
+
+# A class for turning the key presses and releases into the actions of the
+# game, repeating the movements of the held keys with the given DAS and ARR
+class InputHandler:
+
+   # A constructor for creating an input handler with the given DAS and ARR (in
+   # seconds) and the given mapping of the key names to the actions
+   def __init__(self, das=DAS, arr=ARR, key_actions=KEY_ACTIONS):
+      if arr <= 0:
+         raise ValueError("the auto repeat rate must be positive")
+      self.das, self.arr = das, arr
+      self.key_actions = key_actions
+      # the time of the next repeat of each held key with a repeated action
+      self.repeat_times = {}
+
+   # A method that forgets the held keys and the key events that are not
+   # handled yet (e.g. the keys pressed while a menu is displayed)
+   def reset(self):
+      self.repeat_times.clear()
+      stddraw.clearKeyEvents()
+
+   # A method that returns the actions of the keys pressed since the last call
+   # in the order they are pressed, followed by the repeats of the held keys
+   # that are due at the given time (the current time by default). The events
+   # must be checked before by calling stddraw.pollEvents or stddraw.show.
+   def get_actions(self, now=None):
+      actions = []
+      while stddraw.hasNextKeyEvent():
+         key, pressed, event_time = stddraw.nextKeyEvent()
+         action = self.key_actions.get(key)
+         if action is None:
+            continue  # the key does not have an action
+         if not pressed:
+            # a released key stops repeating
+            self.repeat_times.pop(key, None)
+         else:
+            actions.append(action)
+            if action in REPEATED_ACTIONS:
+               self.repeat_times[key] = event_time + self.das
+      if now is None:
+         now = time.perf_counter()
+      # repeat the action of each held key for each elapsed repeat interval
+      for key, repeat_time in self.repeat_times.items():
+         while repeat_time <= now:
+            actions.append(self.key_actions[key])
+            repeat_time += self.arr
+         self.repeat_times[key] = repeat_time
+      return actions
+
+   # A method that returns the time of the next repeat of a held key (None
+   # when no key with a repeated action is held down)
+   def get_next_repeat_time(self):
+      return min(self.repeat_times.values(), default=None)
@@ -0,0 +1,21 @@
+import importlib  # used for importing the module when it is first used
+
+
+# A class for a module that is imported only when one of its attributes is
+# first used. The drawing modules use it for lib.stddraw and lib.picture, so
+# that importing them (and the headless game engine, see engine.py) does not
+# load pygame and tkinter until something is drawn.
+class LazyModule:
+
+   # A constructor for creating a lazily imported module with the given name
+   def __init__(self, name):
+      self._name = name
+      self._module = None
+
+   # A method that returns the given attribute of the module, importing the
+   # module first if it is not imported yet (called only for the attributes
+   # that are not the attributes of this object)
+   def __getattr__(self, attribute):
+      if self._module is None:
+         self._module = importlib.import_module(self._name)
+      return getattr(self._module, attribute)
@@ -9,9 +9,12 @@ objects.
 
 class Color:
     """
-    A Color object models an RGB color.
+    A Color object models an RGB color. Its components are stored in
+    slots instead of a dictionary, which makes Color objects small.
     """
 
+    __slots__ = ('_r', '_g', '_b')
+
     #-------------------------------------------------------------------
 
     def __init__(self, r=0, g=0, b=0):
@@ -49,6 +52,20 @@ class Color:
 
     #-------------------------------------------------------------------
 
+    def __copy__(self):
+        """
+        Return self, as a Color object cannot be changed.
+        """
+        return self
+
+    def __deepcopy__(self, memo):
+        """
+        Return self, as a Color object cannot be changed.
+        """
+        return self
+
+    #-------------------------------------------------------------------
+
     def __str__(self):
         """
         Return the string equivalent of self, that is, a
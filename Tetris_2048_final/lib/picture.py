@@ -20,6 +20,45 @@ import pygame
 _DEFAULT_WIDTH = 512
 _DEFAULT_HEIGHT = 512
 
+# The surfaces of the image files loaded so far keyed by their absolute
+# file names, and the file names of those that have been converted to
+# the pixel format of the window
+_loadedSurfaces = {}
+_convertedFiles = set()
+
+#-----------------------------------------------------------------------
+
+def _loadSurface(fileName):
+    """
+    Return the surface of the image in the file whose name is fileName,
+    reading the file only the first time it is requested. The surface
+    is converted to the pixel format of the window, which makes drawing
+    it fast, as soon as the window exists.
+    """
+    key = os.path.abspath(fileName)
+    surface = _loadedSurfaces.get(key)
+    if surface is None:
+        try:
+            surface = pygame.image.load(fileName)
+        except pygame.error:
+            raise IOError()
+        _loadedSurfaces[key] = surface
+    if (key not in _convertedFiles) and \
+       (pygame.display.get_surface() is not None):
+        surface = surface.convert_alpha()
+        _loadedSurfaces[key] = surface
+        _convertedFiles.add(key)
+    return surface
+
+def preload(*fileNames):
+    """
+    Load the images in the files whose names are given into the image
+    cache so that constructing Picture objects from them later does not
+    read the files.
+    """
+    for fileName in fileNames:
+        _loadSurface(fileName)
+
 #-----------------------------------------------------------------------
 
 class Picture:
@@ -33,10 +72,12 @@ class Picture:
         If both arg1 and arg2 are None, then construct self such that
         it is all black with _DEFAULT_WIDTH and height _DEFAULT_HEIGHT.
         If arg1 is not None and arg2 is None, then construct self by
-        reading from the file whose name is arg1.
+        reading from the file whose name is arg1 (each file is read
+        once and its image is shared until it is changed with set()).
         If neither arg1 nor arg2 is None, then construct self such that
         it is all black with width arg1 and and height arg2.
         """
+        self._shared = False
         if (arg1 is None) and (arg2 is None):
             maxW = _DEFAULT_WIDTH
             maxH = _DEFAULT_HEIGHT
@@ -44,10 +85,8 @@ class Picture:
             self._surface.fill((0, 0, 0))
         elif (arg1 is not None) and (arg2 is None):
             fileName = arg1
-            try:
-                self._surface = pygame.image.load(fileName)
-            except pygame.error:
-                raise IOError()
+            self._surface = _loadSurface(fileName)
+            self._shared = True
         elif (arg1 is not None) and (arg2 is not None):
             maxW = arg1
             maxH = arg2
@@ -96,5 +135,9 @@ class Picture:
         """
         Set the color of self at location (x, y) to c.
         """
+        if self._shared:
+            # Copy the shared image before changing it.
+            self._surface = self._surface.copy()
+            self._shared = False
         pygameColor = pygame.Color(c.getRed(), c.getGreen(), c.getBlue(), 0)
         self._surface.set_at((x, y), pygameColor)
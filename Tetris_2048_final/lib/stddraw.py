@@ -10,6 +10,8 @@ commonly used Color objects defined in the color module.
 import time
 import os
 import sys
+import math
+import collections
 
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = 'hide'
 import pygame
@@ -95,11 +97,32 @@ _canvasWidth = float(_DEFAULT_CANVAS_SIZE)
 _canvasHeight = float(_DEFAULT_CANVAS_SIZE)
 _penRadius = None
 _penColor = _DEFAULT_PEN_COLOR
-_keysTyped = []
+_keysTyped = collections.deque()
+
+# The queue of the keys pressed and released as (key, pressed, time)
+# tuples, which keeps only the most recent _MAX_KEY_EVENTS events when
+# they are not retrieved, and the keys that are currently held down
+_MAX_KEY_EVENTS = 256
+_keyEvents = collections.deque(maxlen=_MAX_KEY_EVENTS)
+_keysHeld = set()
 
 # Has the window been created?
 _windowCreated = False
 
+# The background canvas saved while drawing on a layer (see startLayer)
+_savedSurface = None
+
+# The most recently used fonts keyed by (family, size, bold) and the
+# most recently rendered texts keyed by (string, family, size, bold,
+# color), each evicting its least recently used entry when full
+_FONT_CACHE_SIZE = 16
+_TEXT_CACHE_SIZE = 512
+_fontCache = collections.OrderedDict()
+_textCache = collections.OrderedDict()
+
+# The pygame colors keyed by their (red, green, blue) components
+_pygameColors = {}
+
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
 #-----------------------------------------------------------------------
@@ -121,17 +144,29 @@ _mousePos = None
 def _pygameColor(c):
     """
     Convert c, an object of type color.Color, to an equivalent object
-    of type pygame.Color.  Return the result.
+    of type pygame.Color.  Return the result, which is shared by all
+    colors with the same components and must not be changed.
     """
-    r = c.getRed()
-    g = c.getGreen()
-    b = c.getBlue()
-    return pygame.Color(r, g, b)
+    key = (c.getRed(), c.getGreen(), c.getBlue())
+    pygameColor = _pygameColors.get(key)
+    if pygameColor is None:
+        pygameColor = pygame.Color(*key)
+        _pygameColors[key] = pygameColor
+    return pygameColor
 
 #-----------------------------------------------------------------------
 
 # Private functions to scale and factor X and Y values.
 
+def _pygameRect(x, y, w, h):
+    """
+    Return the pygame.Rect on the canvas of the rectangle of width w
+    and height h whose lower left point is (x, y).
+    """
+    ws = _factorX(float(w))
+    hs = _factorY(float(h))
+    return pygame.Rect(_scaleX(float(x)), _scaleY(float(y))-hs, ws, hs)
+
 def _scaleX(x):
     return _canvasWidth * (x - _xmin) / (_xmax - _xmin)
 
@@ -186,6 +221,12 @@ def setCanvasSize(w=_DEFAULT_CANVAS_SIZE, h=_DEFAULT_CANVAS_SIZE):
     _surface.fill(_pygameColor(WHITE))
     _windowCreated = True
 
+def getCanvasSize():
+    """
+    Return the size of the canvas as a (width, height) tuple in pixels.
+    """
+    return (int(_canvasWidth), int(_canvasHeight))
+
 def setXscale(min=_DEFAULT_XMIN, max=_DEFAULT_XMAX):
     """
     Set the x-scale of the canvas such that the minimum x value
@@ -489,8 +530,7 @@ def text(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _renderText(s, False)
     textpos = text.get_rect(center=(xs, ys))
     _surface.blit(text, textpos)
 
@@ -503,11 +543,45 @@ def boldText(x, y, s):
     y = float(y)
     xs = _scaleX(x)
     ys = _scaleY(y)
-    font = pygame.font.SysFont(_fontFamily, _fontSize, True)
-    text = font.render(s, 1, _pygameColor(_penColor))
+    text = _renderText(s, True)
     textpos = text.get_rect(center=(xs, ys))
     _surface.blit(text, textpos)
 
+def _getFont(family, size, bold):
+    """
+    Return the pygame font with the given family, size and boldness,
+    creating it only if it is not in the font cache.
+    """
+    key = (family, size, bold)
+    font = _fontCache.get(key)
+    if font is None:
+        font = pygame.font.SysFont(family, size, bold)
+        _fontCache[key] = font
+        if len(_fontCache) > _FONT_CACHE_SIZE:
+            _fontCache.popitem(last=False)
+    else:
+        _fontCache.move_to_end(key)
+    return font
+
+def _renderText(s, bold):
+    """
+    Return a surface with string s rendered in the current font and pen
+    color, rendering it only if it is not in the text cache.
+    """
+    c = _penColor
+    key = (s, _fontFamily, _fontSize, bold,
+           c.getRed(), c.getGreen(), c.getBlue())
+    text = _textCache.get(key)
+    if text is None:
+        font = _getFont(_fontFamily, _fontSize, bold)
+        text = font.render(s, 1, _pygameColor(c))
+        _textCache[key] = text
+        if len(_textCache) > _TEXT_CACHE_SIZE:
+            _textCache.popitem(last=False)
+    else:
+        _textCache.move_to_end(key)
+    return text
+
 def picture(pic, x=None, y=None):
     """
     Draw pic on the background canvas centered at (x, y).  pic is an
@@ -558,6 +632,103 @@ def save(f):
 
 #-----------------------------------------------------------------------
 
+# Functions to draw on layers, surfaces of the same size as the
+# background canvas that can be drawn once and then reused.
+
+def startLayer(transparent=False):
+    """
+    Start drawing on a new layer instead of the background canvas.
+    All drawing functions draw on the layer until endLayer() is called.
+    If transparent is True, then the layer is transparent except where
+    it is drawn on. Otherwise it is filled with white.
+    """
+    global _surface
+    global _savedSurface
+    _makeSureWindowCreated()
+    if _savedSurface is not None:
+        raise Exception('A layer has already been started')
+    _savedSurface = _surface
+    if transparent:
+        _surface = pygame.Surface(
+            (int(_canvasWidth), int(_canvasHeight)), pygame.SRCALPHA)
+        _surface.fill((0, 0, 0, 0))
+    else:
+        _surface = pygame.Surface((int(_canvasWidth), int(_canvasHeight)))
+        _surface.fill(_pygameColor(WHITE))
+
+def endLayer():
+    """
+    Stop drawing on the layer started by startLayer() and draw on the
+    background canvas again. Return the layer converted to the pixel
+    format of the window, which makes drawing it with drawLayer() fast.
+    """
+    global _surface
+    global _savedSurface
+    if _savedSurface is None:
+        raise Exception('No layer has been started')
+    layer = _surface
+    _surface = _savedSurface
+    _savedSurface = None
+    if layer.get_flags() & pygame.SRCALPHA:
+        return layer.convert_alpha()
+    return layer.convert()
+
+def drawLayer(layer, x=None, y=None, w=None, h=None):
+    """
+    Draw layer, a surface returned by endLayer(), on the background
+    canvas with a single blit. If x, y, w and h are given, then draw
+    only the part of layer in the rectangle of width w and height h
+    whose lower left point is (x, y).
+    """
+    _makeSureWindowCreated()
+    if x is None:
+        _surface.blit(layer, (0, 0))
+    else:
+        rect = _pygameRect(x, y, w, h)
+        _surface.blit(layer, rect, rect)
+
+def startSprite():
+    """
+    Start drawing a sprite on a new transparent layer (see startLayer).
+    Return the point (x, y) at the center of the canvas, around which
+    the sprite should be drawn so that it is not clipped.
+    """
+    startLayer(True)
+    return (_userX(_canvasWidth / 2.0), _userY(_canvasHeight / 2.0))
+
+def endSprite(x, y):
+    """
+    Stop drawing on the layer started by startSprite() and return the
+    drawn part of it as a sprite anchored at (x, y). Drawing the sprite
+    at another point with drawSprite() or drawSprites() gives the same
+    pixels as drawing the same things around that point.
+    """
+    layer = endLayer()
+    rect = layer.get_bounding_rect()
+    return (layer.subsurface(rect).copy(),
+            rect.x - _scaleX(float(x)),
+            rect.y - _scaleY(float(y)))
+
+def drawSprite(sprite, x, y):
+    """
+    Draw sprite, a sprite returned by endSprite(), on the background
+    canvas anchored at (x, y).
+    """
+    drawSprites([(sprite, x, y)])
+
+def drawSprites(sprites):
+    """
+    Draw each (sprite, x, y) tuple in sprites on the background canvas
+    as drawSprite(sprite, x, y) does, with a single call to blits.
+    """
+    _makeSureWindowCreated()
+    _surface.blits(
+        [(surface, (int(_scaleX(float(x)) + dx), int(_scaleY(float(y)) + dy)))
+         for ((surface, dx, dy), x, y) in sprites],
+        False)
+
+#-----------------------------------------------------------------------
+
 def _show():
     """
     Copy the background canvas to the window canvas.
@@ -566,6 +737,20 @@ def _show():
     pygame.display.flip()
     _checkForEvents()
 
+def showRegions(regions):
+    """
+    Copy only the given regions of the background canvas to the window
+    canvas, which is faster than show() when few parts of the drawing
+    have changed. Each region is an (x, y, w, h) tuple giving the
+    rectangle of width w and height h whose lower left point is (x, y).
+    """
+    _makeSureWindowCreated()
+    rects = [_pygameRect(x, y, w, h) for (x, y, w, h) in regions]
+    for rect in rects:
+        _background.blit(_surface, rect, rect)
+    pygame.display.update(rects)
+    _checkForEvents()
+
 def _showAndWaitForever():
     """
     Copy the background canvas to the window canvas. Then wait
@@ -573,10 +758,8 @@ def _showAndWaitForever():
     """
     _makeSureWindowCreated()
     _show()
-    QUANTUM = .1
     while True:
-        time.sleep(QUANTUM)
-        _checkForEvents()
+        waitForEvent()
 
 def show(msec=float('inf')):
     """
@@ -590,18 +773,35 @@ def show(msec=float('inf')):
     _show()
     _checkForEvents()
 
-    # Sleep for the required time, but check for events every
-    # QUANTUM seconds.
-    QUANTUM = .01
-    sec = msec / 1000.0
-    if sec < QUANTUM:
-        time.sleep(sec)
-        return
-    secondsWaited = 0.0
-    while secondsWaited < sec:
-        time.sleep(QUANTUM)
-        secondsWaited += QUANTUM
-        _checkForEvents()
+    # Wait for the required time, handling each event as soon as it
+    # occurs.
+    endTime = time.perf_counter() + msec / 1000.0
+    while True:
+        remaining = endTime - time.perf_counter()
+        if remaining <= 0.0:
+            return
+        waitForEvent(remaining)
+
+def waitForEvent(timeout=None):
+    """
+    Wait until a new event occurs (such as a key typed or button
+    pressed) or until timeout seconds pass, whichever is first, and
+    then check all new events as pollEvents() does. timeout defaults
+    to None, which means waiting until an event occurs. Return True if
+    an event has occurred, and False otherwise. The program does not
+    use the CPU while waiting.
+    """
+    _makeSureWindowCreated()
+    if timeout is None:
+        event = pygame.event.wait()
+    else:
+        # pygame.event.wait() takes the timeout in whole milliseconds.
+        event = pygame.event.wait(max(1, int(math.ceil(timeout * 1000.0))))
+    if event.type == pygame.NOEVENT:
+        return False
+    _handleEvent(event)
+    _checkForEvents()
+    return True
 
 #-----------------------------------------------------------------------
 
@@ -650,8 +850,16 @@ def _checkForEvents():
     Check if any new event has occured (such as a key typed or button
     pressed).  If a key has been typed, then put that key in a queue.
     """
+    _makeSureWindowCreated()
+
+    for event in pygame.event.get():
+        _handleEvent(event)
+
+def _handleEvent(event):
+    """
+    Handle event, an event returned by pygame (see _checkForEvents).
+    """
     global _surface
-    global _keysTyped
     
     #-------------------------------------------------------------------
     # Begin added by Alan J. Broder
@@ -662,29 +870,47 @@ def _checkForEvents():
     # End added by Alan J. Broder
     #-------------------------------------------------------------------
     
-    _makeSureWindowCreated()
+    if event.type == pygame.QUIT:
+        sys.exit()
+    elif event.type == pygame.KEYDOWN:
+        key = pygame.key.name(event.key)
+        _keysTyped.append(key)
+        _keysHeld.add(key)
+        _keyEvents.append((key, True, time.perf_counter()))
+    elif event.type == pygame.KEYUP:
+        key = pygame.key.name(event.key)
+        _keysHeld.discard(key)
+        _keyEvents.append((key, False, time.perf_counter()))
+    elif event.type == pygame.WINDOWFOCUSLOST:
+        # The window does not receive the releases of the held keys
+        # anymore, so release them now.
+        for key in _keysHeld:
+            _keyEvents.append((key, False, time.perf_counter()))
+        _keysHeld.clear()
+    elif (event.type == pygame.MOUSEBUTTONUP) and \
+        (event.button == 3):
+        _saveToFile()
+        
+    #-------------------------------------------------------------------
+    # Begin added by Alan J. Broder
+    #-------------------------------------------------------------------
+    # Every time the mouse button is pressed, remember
+    # the mouse position as of that press.
+    elif (event.type == pygame.MOUSEBUTTONDOWN) and \
+        (event.button == 1): 
+        _mousePressed = True
+        _mousePos = event.pos                      
+    #-------------------------------------------------------------------
+    # End added by Alan J. Broder
+    #-------------------------------------------------------------------
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-        elif event.type == pygame.KEYDOWN:
-            _keysTyped = [pygame.key.name(event.key)] + _keysTyped
-        elif (event.type == pygame.MOUSEBUTTONUP) and \
-            (event.button == 3):
-            _saveToFile()
-            
-        #---------------------------------------------------------------
-        # Begin added by Alan J. Broder
-        #---------------------------------------------------------------
-        # Every time the mouse button is pressed, remember
-        # the mouse position as of that press.
-        elif (event.type == pygame.MOUSEBUTTONDOWN) and \
-            (event.button == 1): 
-            _mousePressed = True
-            _mousePos = event.pos                      
-        #---------------------------------------------------------------
-        # End added by Alan J. Broder
-        #---------------------------------------------------------------
+def pollEvents():
+    """
+    Check if any new event has occured (such as a key typed or button
+    pressed) without copying the background canvas to the window
+    canvas and without waiting.
+    """
+    _checkForEvents()
 
 #-----------------------------------------------------------------------
 
@@ -695,23 +921,50 @@ def hasNextKeyTyped():
     Return True if the queue of the keys the user typed is not empty.
     Otherwise return False.
     """
-    global _keysTyped
-    return _keysTyped != []
+    return len(_keysTyped) != 0
 
 def nextKeyTyped():
     """
     Remove the first key from the queue of the keys that the user typed,
     and return that key.
     """
-    global _keysTyped
-    return _keysTyped.pop()
+    return _keysTyped.popleft()
 
 def clearKeysTyped():
     """
     Clear all the keys in the queue of the keys that the user typed.
     """
-    global _keysTyped
-    _keysTyped = []
+    _keysTyped.clear()
+
+def hasNextKeyEvent():
+    """
+    Return True if the queue of the keys the user pressed or released
+    is not empty. Otherwise return False.
+    """
+    return len(_keyEvents) != 0
+
+def nextKeyEvent():
+    """
+    Remove the first event from the queue of the keys that the user
+    pressed or released, and return it as a (key, pressed, time) tuple,
+    where pressed is False for a released key and time is the value of
+    time.perf_counter() when the event was checked.
+    """
+    return _keyEvents.popleft()
+
+def clearKeyEvents():
+    """
+    Clear all the events in the queue of the keys that the user pressed
+    or released.
+    """
+    _keyEvents.clear()
+
+def isKeyPressed(key):
+    """
+    Return True if the key with the given name (such as 'left' or
+    'space') is held down. Otherwise return False.
+    """
+    return key in _keysHeld
 
 #-----------------------------------------------------------------------
 # Begin added by Alan J. Broder
@@ -0,0 +1,49 @@
+import collections  # used for the queue of the generated pieces
+import random  # used for generating the pieces from a seeded stream
+from tetromino import SHAPES  # the types (shapes) of the tetrominoes
+
+# the types of the tetrominoes and the values of their tiles
+TETROMINO_TYPES = ("I", "O", "Z")
+TILE_VALUES = (2, 4)
+# the number of pieces generated at once
+BATCH_SIZE = 64
+
+
+# A class for generating the pieces of a game (the type of each tetromino, the
+# horizontal position it enters the game grid at and the values of its tiles)
+# from a single random number stream, so that the same seed always gives the
+# same pieces regardless of how the game is played or displayed
+class PieceGenerator:
+
+   # A constructor for creating a generator with the given integer seed (a
+   # random seed is chosen when it is None) that generates batch_size pieces
+   # at once (the seed is an integer so that it can be stored in a replay)
+   def __init__(self, seed=None, batch_size=BATCH_SIZE):
+      if seed is None:
+         seed = random.randrange(2 ** 32)
+      elif not isinstance(seed, int):
+         raise TypeError("the seed must be an integer: " + repr(seed))
+      self.seed = seed
+      self.rng = random.Random(seed)
+      self.batch_size = batch_size
+      # the generated pieces that are not used yet
+      self.pieces = collections.deque()
+
+   # A method that returns the next piece as (type, x, tile_values) for a game
+   # grid with the given width, where x is the column of the bottom left cell
+   # of the tile matrix of the tetromino
+   def next_piece(self, grid_width):
+      if not self.pieces:
+         self.generate_batch(grid_width)
+      return self.pieces.popleft()
+
+   # A method that generates the next batch_size pieces for a game grid with
+   # the given width
+   def generate_batch(self, grid_width):
+      rng = self.rng
+      types = rng.choices(TETROMINO_TYPES, k=self.batch_size)
+      for shape in types:
+         n, cells = SHAPES[shape]
+         x = rng.randrange(grid_width - n + 1)
+         values = rng.choices(TILE_VALUES, k=len(cells))
+         self.pieces.append((shape, x, values))
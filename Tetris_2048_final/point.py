@@ -1,5 +1,8 @@
 # A class for modeling a point as a location in 2D space
 class Point:
+   # the attributes of a point are stored in slots instead of a dictionary,
+   # which makes points smaller and faster to create
+   __slots__ = ("x", "y")
 
    # A constructor that creates a point at a given location as x and y values
    # (The default values for the given location are set as x = 0 and y = 0.)
@@ -0,0 +1,162 @@
+################################################################################
+#                                                                              #
+# The phase profiler of Tetris 2048                                            #
+#                                                                              #
+# Times the phases of each iteration (tick) of the game loop with             #
+# perf_counter_ns: handling the input, moving the tetromino, the stages of    #
+# the landing pipeline and displaying the game grid. It keeps the durations   #
+# of the last ticks as rolling histograms, can show them on an overlay and    #
+# writes a JSONL trace with a line per tick. A disabled profiler only costs a #
+# method call per phase, so the hooks can stay in the game loop.               #
+#                                                                              #
+################################################################################
+
+import atexit  # used for writing the rest of the trace at exit
+import collections  # used for the rolling windows of the durations
+import json  # used for writing the trace
+import time  # used for timing the phases
+
+# the timed phases in the order of a tick (the landing stages are a part of
+# the movement phase as the tetromino lands by moving down or hard dropping)
+PHASES = ("input", "movement", "landing.lock", "landing.free_tiles",
+          "landing.merge", "landing.clear_rows", "display")
+# the number of the last ticks kept for the histograms
+WINDOW = 600
+# the upper bounds (in microseconds) of the buckets of the histograms (the
+# last bucket has no upper bound)
+BUCKETS_US = (10, 30, 100, 300, 1000, 3000, 10000, 30000)
+# the number of the trace lines buffered before writing them to the file
+TRACE_BUFFER = 1000
+
+
+# A class for timing the phases of the game loop ticks
+class PhaseProfiler:
+
+   # A constructor for creating a profiler, which does nothing unless enabled,
+   # writing the trace to the file with the given name (if any)
+   def __init__(self, enabled=False, trace_file=None, window=WINDOW):
+      self.enabled = enabled
+      # whether the overlay is displayed (see draw_overlay)
+      self.overlay_visible = False
+      # the durations (in ns) of the phases of the current tick
+      self.current = {}
+      # the durations of the phases in the last ticks in which they occurred
+      self.samples = {phase: collections.deque(maxlen=window)
+                      for phase in PHASES}
+      self.ticks = 0
+      self.start_time = time.perf_counter_ns()
+      self.trace_file = trace_file
+      self.trace = []
+      if enabled and trace_file is not None:
+         # start a new trace file and write the rest of the trace at exit
+         open(trace_file, "w").close()
+         atexit.register(self.close)
+
+   # A method that returns the start time of a phase (0 when disabled)
+   def start(self):
+      if not self.enabled:
+         return 0
+      return time.perf_counter_ns()
+
+   # A method that adds the time elapsed since the given start time to the
+   # given phase of the current tick and returns the current time, which is
+   # the start time of the next phase (0 when disabled)
+   def lap(self, phase, start_time):
+      if not self.enabled:
+         return 0
+      now = time.perf_counter_ns()
+      self.current[phase] = self.current.get(phase, 0) + now - start_time
+      return now
+
+   # A method that ends the current tick by adding the durations of its phases
+   # to the histograms and the trace
+   def end_tick(self):
+      if not self.enabled:
+         return
+      self.ticks += 1
+      for phase, duration in self.current.items():
+         self.samples[phase].append(duration)
+      if self.trace_file is not None:
+         record = {"tick": self.ticks,
+                   "t_ns": time.perf_counter_ns() - self.start_time}
+         record.update(self.current)
+         self.trace.append(record)
+         if len(self.trace) >= TRACE_BUFFER:
+            self.flush()
+      self.current = {}
+
+   # A method that returns the statistics of the given phase over the last
+   # ticks as a dictionary (the durations are in microseconds)
+   def get_stats(self, phase):
+      samples = sorted(self.samples[phase])
+      if not samples:
+         return {"count": 0}
+      n = len(samples)
+      return {
+         "count": n,
+         "mean_us": sum(samples) / n / 1000,
+         "p50_us": samples[n // 2] / 1000,
+         "p99_us": samples[min(n - 1, int(0.99 * n))] / 1000,
+         "max_us": samples[-1] / 1000,
+      }
+
+   # A method that returns the rolling histogram of the given phase as the
+   # number of durations in each bucket of BUCKETS_US (plus one more bucket
+   # for the longer durations)
+   def get_histogram(self, phase):
+      counts = [0] * (len(BUCKETS_US) + 1)
+      for duration in self.samples[phase]:
+         bucket = 0
+         while bucket < len(BUCKETS_US) and duration > BUCKETS_US[bucket] * 1000:
+            bucket += 1
+         counts[bucket] += 1
+      return counts
+
+   # A method that writes the buffered trace lines to the trace file
+   def flush(self):
+      if self.trace_file is None or not self.trace:
+         return
+      with open(self.trace_file, "a") as file:
+         for record in self.trace:
+            file.write(json.dumps(record) + "\n")
+      self.trace = []
+
+   # A method that writes the rest of the trace followed by a summary line with
+   # the statistics and the histograms of the phases (called at exit)
+   def close(self):
+      if self.trace_file is None:
+         return
+      summary = {phase: dict(self.get_stats(phase),
+                             histogram=self.get_histogram(phase))
+                 for phase in PHASES}
+      self.trace.append({"summary": summary, "buckets_us": list(BUCKETS_US)})
+      self.flush()
+      self.trace_file = None
+
+   # A method for showing or hiding the overlay
+   def toggle_overlay(self):
+      self.overlay_visible = not self.overlay_visible
+
+   # A method for drawing the statistics of the phases in the given region of
+   # the canvas over the given background layer (the region is an (x, y, w, h)
+   # tuple as in stddraw.showRegions) and showing them
+   def draw_overlay(self, background, region):
+      import lib.stddraw as stddraw  # pygame is needed only for the overlay
+      from lib.color import Color
+      x, y, w, h = region
+      stddraw.drawLayer(background, x, y, w, h)
+      stddraw.setPenColor(Color(255, 255, 255))
+      stddraw.setFontFamily("Arial")
+      stddraw.setFontSize(13)
+      line_height = h / (len(PHASES) + 1)
+      text_y = y + h - line_height / 2
+      stddraw.text(x + w / 2, text_y, "phase  mean / p99 (us)")
+      for phase in PHASES:
+         text_y -= line_height
+         stats = self.get_stats(phase)
+         if stats["count"]:
+            line = "%s  %.0f / %.0f" % (phase, stats["mean_us"], stats["p99_us"])
+         else:
+            line = phase + "  -"
+         stddraw.text(x + w / 2, text_y, line)
+      stddraw.showRegions([region])
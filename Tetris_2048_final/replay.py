@@ -0,0 +1,211 @@
+################################################################################
+#                                                                              #
+# Recording and playback of Tetris 2048 games                                  #
+#                                                                              #
+# A game is fully determined by the seed of its pieces and the actions applied #
+# to it between the auto fall steps (ticks) of the game engine, so a replay    #
+# stores only these. Each action is a single varint holding the number of      #
+# ticks since the previous action and the action code (tick_delta << 3 |       #
+# code), which takes one or two bytes for almost every action. A file holds    #
+# the replays of the games of a session one after another.                     #
+#                                                                              #
+################################################################################
+
+import atexit  # used for saving the replay of an unfinished game at exit
+from engine import GameEngine, ACTIONS  # the headless game engine
+
+# the bytes at the start of each replay and the version of the format
+MAGIC = b"T2R"
+VERSION = 1
+# the code of the last event of a replay (the action codes are the indexes of
+# the actions in ACTIONS)
+END = 7
+CODE_BITS = 3
+
+
+# A function that appends the given non-negative integer to the given
+# bytearray as a varint (7 bits per byte, the high bit set on all but the last)
+def write_varint(data, value):
+   while value >= 0x80:
+      data.append((value & 0x7F) | 0x80)
+      value >>= 7
+   data.append(value)
+
+
+# A function that maps the given integer to a non-negative integer for writing
+# it as a varint (0, -1, 1, -2, 2, ... are mapped to 0, 1, 2, 3, 4, ...)
+def zigzag_encode(value):
+   return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+# A function that maps the given non-negative integer back to the integer
+# encoded by zigzag_encode
+def zigzag_decode(value):
+   return value >> 1 if value & 1 == 0 else -((value + 1) >> 1)
+
+
+# A function that reads a varint from the given bytes at the given position
+# and returns it with the position after it
+def read_varint(data, position):
+   value, shift = 0, 0
+   while True:
+      if position >= len(data):
+         raise ValueError("truncated replay")
+      byte = data[position]
+      position += 1
+      value |= (byte & 0x7F) << shift
+      if byte < 0x80:
+         return value, position
+      shift += 7
+
+
+# A class for modeling the replay of a game as its seed, grid dimensions and
+# the (tick, action) events applied to it
+class Replay:
+
+   # A constructor for creating a replay of a game with the given seed and
+   # grid dimensions
+   def __init__(self, seed, grid_h=20, grid_w=12):
+      self.seed = seed
+      self.grid_h, self.grid_w = grid_h, grid_w
+      # the actions as (tick, action) tuples in the order they are applied
+      self.events = []
+      # the number of ticks of the game when the replay ends (None until the
+      # replay is finished)
+      self.end_tick = None
+
+   # A method for recording an action applied to the game after the given
+   # number of ticks (see GameEngine.apply)
+   def record(self, tick, action):
+      self.events.append((tick, action))
+
+   # A method for ending the replay after the given number of ticks
+   def finish(self, tick):
+      self.end_tick = tick
+
+   # A method that returns the replay encoded as bytes
+   def to_bytes(self):
+      data = bytearray(MAGIC)
+      data.append(VERSION)
+      write_varint(data, zigzag_encode(self.seed))
+      write_varint(data, self.grid_h)
+      write_varint(data, self.grid_w)
+      previous_tick = 0
+      for tick, action in self.events:
+         write_varint(data, (tick - previous_tick) << CODE_BITS
+                      | ACTIONS.index(action))
+         previous_tick = tick
+      end_tick = self.end_tick if self.end_tick is not None else previous_tick
+      write_varint(data, (end_tick - previous_tick) << CODE_BITS | END)
+      return bytes(data)
+
+   # A static method that decodes a replay from the given bytes starting at
+   # the given position and returns it with the position after it
+   @staticmethod
+   def from_bytes(data, position=0):
+      if data[position:position + len(MAGIC)] != MAGIC:
+         raise ValueError("not a replay")
+      position += len(MAGIC)
+      if position >= len(data):
+         raise ValueError("truncated replay")
+      if data[position] != VERSION:
+         raise ValueError("unknown replay version: " + str(data[position]))
+      position += 1
+      seed, position = read_varint(data, position)
+      seed = zigzag_decode(seed)
+      grid_h, position = read_varint(data, position)
+      grid_w, position = read_varint(data, position)
+      replay = Replay(seed, grid_h, grid_w)
+      tick = 0
+      while True:
+         value, position = read_varint(data, position)
+         tick += value >> CODE_BITS
+         code = value & ((1 << CODE_BITS) - 1)
+         if code == END:
+            replay.finish(tick)
+            return replay, position
+         if code >= len(ACTIONS):
+            raise ValueError("unknown action code: " + str(code))
+         replay.record(tick, ACTIONS[code])
+
+
+# A function for appending the given replay to the file with the given name
+def save_replay(replay, file_name):
+   with open(file_name, "ab") as file:
+      file.write(replay.to_bytes())
+
+
+# A function that returns the list of the replays in the file with the given
+# name (in the order the games are played)
+def load_replays(file_name):
+   with open(file_name, "rb") as file:
+      data = file.read()
+   replays, position = [], 0
+   while position < len(data):
+      replay, position = Replay.from_bytes(data, position)
+      replays.append(replay)
+   return replays
+
+
+# A class for recording the games of a session into a file (the replay of the
+# game being played is saved at exit as well)
+class ReplayWriter:
+
+   # A constructor for creating a writer that starts a new file with the given
+   # name
+   def __init__(self, file_name):
+      self.file_name = file_name
+      open(file_name, "wb").close()
+      self.game = None
+      atexit.register(self.end_game)
+
+   # A method for starting to record the given game
+   def start_game(self, game):
+      self.end_game()
+      game.recorder = Replay(game.seed, game.grid.grid_height,
+                             game.grid.grid_width)
+      self.game = game
+
+   # A method for saving the replay of the recorded game (if any)
+   def end_game(self):
+      if self.game is None:
+         return
+      replay = self.game.recorder
+      replay.finish(self.game.ticks)
+      save_replay(replay, self.file_name)
+      self.game.recorder = None
+      self.game = None
+
+
+# A generator function that plays the given replay on the given game (a new
+# game created from the replay by default) by applying its actions between the
+# ticks, and yields the game after each tick and action so that the playback
+# can be displayed
+def replay_steps(replay, game=None):
+   if game is None:
+      game = create_game(replay)
+   for tick, action in replay.events:
+      while game.ticks < tick and not game.game_over:
+         game.tick()
+         yield game
+      game.apply(action)
+      yield game
+   while game.ticks < replay.end_tick and not game.game_over:
+      game.tick()
+      yield game
+
+
+# A function that creates a new game for playing the given replay (the compact
+# storage mode gives the same game and is faster when it is not displayed)
+def create_game(replay, compact=False):
+   return GameEngine(replay.grid_h, replay.grid_w, compact=compact,
+                     seed=replay.seed)
+
+
+# A function that plays the given replay at full speed without displaying it
+# and returns the resulting game
+def play_replay(replay):
+   game = create_game(replay, compact=True)
+   for game in replay_steps(replay, game):
+      pass
+   return game
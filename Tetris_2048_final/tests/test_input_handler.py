@@ -0,0 +1,99 @@
+################################################################################
+#                                                                              #
+# Tests of the input handler of Tetris 2048                                    #
+#                                                                              #
+# Feeds timed key events through the key event queue of stddraw and checks   #
+# the actions of the key presses and the DAS/ARR repeats of the held keys.     #
+# Usage (from any directory):                                                  #
+#                                                                              #
+#    python -m pytest tests                                                    #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# stddraw must not open a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest  # the test framework
+stddraw = pytest.importorskip("lib.stddraw")  # the key event queue
+from input_handler import InputHandler  # the class under test
+
+# the DAS and ARR of the tested input handlers (in seconds)
+DAS, ARR = 0.2, 0.05
+
+
+# A fixture that returns an input handler with an empty key event queue
+@pytest.fixture
+def handler():
+   stddraw.clearKeyEvents()
+   yield InputHandler(DAS, ARR)
+   stddraw.clearKeyEvents()
+
+
+# A function that puts a press (or a release) of the key with the given name
+# at the given time into the key event queue of stddraw
+def key_event(key, event_time, pressed=True):
+   stddraw._keyEvents.append((key, pressed, event_time))
+
+
+# A test of each press of a key giving its action once
+def test_each_press_gives_one_action(handler):
+   key_event("left", 0.0)
+   key_event("left", 0.01, False)
+   key_event("up", 0.02)
+   key_event("up", 0.03, False)
+   key_event("left", 0.04)
+   key_event("left", 0.05, False)
+   key_event("a", 0.06)  # a key without an action
+   assert handler.get_actions(now=0.1) == ["left", "rotate", "left"]
+   assert handler.get_actions(now=1.0) == []
+
+
+# A test of a held key repeating its action first after DAS and then after
+# each ARR
+def test_held_key_repeats_after_das_then_every_arr(handler):
+   key_event("right", 1.0)
+   assert handler.get_actions(now=1.0) == ["right"]
+   assert handler.get_next_repeat_time() == pytest.approx(1.0 + DAS)
+   # no repeat before DAS
+   assert handler.get_actions(now=1.0 + DAS - 0.001) == []
+   # the first repeat at DAS
+   assert handler.get_actions(now=1.0 + DAS) == ["right"]
+   # the next repeats every ARR
+   assert handler.get_actions(now=1.0 + DAS + ARR - 0.001) == []
+   assert handler.get_actions(now=1.0 + DAS + ARR + 0.001) == ["right"]
+   # all the repeats due since the last call are given at once
+   assert handler.get_actions(now=1.0 + DAS + 4 * ARR + 0.001) == ["right"] * 3
+
+
+# A test of releasing a held key stopping its repeats
+def test_release_stops_the_repeats(handler):
+   key_event("down", 0.0)
+   assert handler.get_actions(now=DAS + 0.001) == ["down", "down"]
+   key_event("down", DAS + 0.01, False)
+   assert handler.get_actions(now=5.0) == []
+   assert handler.get_next_repeat_time() is None
+
+
+# A test of the rotation and the hard drop keys never repeating
+@pytest.mark.parametrize("key, action", [("up", "rotate"),
+                                         ("space", "hard_drop"),
+                                         ("left shift", "hard_drop")])
+def test_rotate_and_hard_drop_do_not_repeat(handler, key, action):
+   key_event(key, 0.0)
+   assert handler.get_actions(now=0.0) == [action]
+   assert handler.get_next_repeat_time() is None
+   assert handler.get_actions(now=5.0) == []
+
+
+# A test of resetting the handler forgetting the held keys and the queued
+# key events
+def test_reset_forgets_held_keys_and_queued_events(handler):
+   key_event("left", 0.0)
+   handler.get_actions(now=0.0)
+   key_event("right", 0.1)
+   handler.reset()
+   assert handler.get_actions(now=5.0) == []
@@ -0,0 +1,115 @@
+################################################################################
+#                                                                              #
+# Tests of the recording and playback of Tetris 2048 games                     #
+#                                                                              #
+# Checks the encoding of the replays, the handling of invalid replay data and #
+# that playing back a recorded game reproduces it. Usage (from any directory): #
+#                                                                              #
+#    python -m pytest tests                                                    #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random  # used for choosing the actions of the recorded games
+import pytest  # the test framework
+from engine import GameEngine, ACTIONS  # the headless game engine
+from replay import (Replay, ReplayWriter, load_replays, play_replay,
+                    save_replay)
+
+
+# A function that plays a game with the given seed and random actions chosen
+# with the given seed of the moves while recording it (returns the game)
+def play_recorded_game(seed, moves_seed, compact=False):
+   rng = random.Random(moves_seed)
+   game = GameEngine(compact=compact, seed=seed)
+   game.recorder = Replay(seed, game.grid.grid_height, game.grid.grid_width)
+   while not game.game_over:
+      game.step(rng.choice(ACTIONS))
+   game.recorder.finish(game.ticks)
+   return game
+
+
+# A test of encoding and decoding replays with zero, positive and negative
+# seeds (the seed is zigzag encoded)
+@pytest.mark.parametrize("seed", [0, 1, -1, -3, 2 ** 40, -2 ** 40])
+def test_replay_round_trip(seed):
+   replay = Replay(seed, 20, 12)
+   replay.record(0, "left")
+   replay.record(0, "rotate")
+   replay.record(3, "hard_drop")
+   replay.record(200, "down")
+   replay.finish(205)
+   data = replay.to_bytes()
+   decoded, position = Replay.from_bytes(data)
+   assert position == len(data)
+   assert decoded.seed == seed
+   assert (decoded.grid_h, decoded.grid_w) == (20, 12)
+   assert decoded.events == replay.events
+   assert decoded.end_tick == 205
+
+
+# A test of decoding every truncated prefix of a replay
+def test_truncated_replay_raises_value_error():
+   data = play_recorded_game(-5, 1).recorder.to_bytes()
+   for length in range(len(data)):
+      with pytest.raises(ValueError):
+         Replay.from_bytes(data[:length])
+
+
+# A test of decoding data that does not start with the replay magic bytes
+def test_bad_magic_raises_value_error():
+   data = Replay(7).to_bytes()
+   with pytest.raises(ValueError):
+      Replay.from_bytes(b"XYZ" + data[3:])
+
+
+# A test of loading an empty replay file (as left by recording a session in
+# which no game is started)
+def test_load_replays_from_empty_file(tmp_path):
+   file_name = tmp_path / "empty.t2r"
+   file_name.write_bytes(b"")
+   assert load_replays(str(file_name)) == []
+
+
+# A test of playing back recorded games, which must give the same boards and
+# scores as the recorded games
+@pytest.mark.parametrize("seed", [3, -11])
+def test_play_replay_reproduces_the_game(seed, tmp_path):
+   file_name = str(tmp_path / "games.t2r")
+   games = [play_recorded_game(seed, moves_seed) for moves_seed in range(3)]
+   for game in games:
+      save_replay(game.recorder, file_name)
+   replays = load_replays(file_name)
+   assert len(replays) == len(games)
+   for game, replay in zip(games, replays):
+      played = play_replay(replay)
+      assert played.game_over
+      assert played.score == game.score
+      assert played.pieces == game.pieces
+      assert played.ticks == game.ticks
+      assert played.grid.get_board_key() == game.grid.get_board_key()
+
+
+# A test of recording a session with a replay writer, where the last game is
+# saved unfinished
+def test_replay_writer_records_each_game(tmp_path):
+   file_name = str(tmp_path / "session.t2r")
+   writer = ReplayWriter(file_name)
+   rng = random.Random(2)
+   games = [GameEngine(seed=seed) for seed in (8, -8)]
+   for game in games:
+      writer.start_game(game)
+      for i in range(300):
+         game.step(rng.choice(ACTIONS))
+   writer.end_game()
+   replays = load_replays(file_name)
+   assert [replay.seed for replay in replays] == [8, -8]
+   for game, replay in zip(games, replays):
+      played = play_replay(replay)
+      assert played.score == game.score
+      assert played.ticks == game.ticks
+      assert played.grid.get_board_key() == game.grid.get_board_key()
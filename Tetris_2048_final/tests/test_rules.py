@@ -0,0 +1,165 @@
+################################################################################
+#                                                                              #
+# Tests of the game rules of Tetris 2048                                       #
+#                                                                              #
+# Checks the rule kernels against simple reference behaviour: clearing full    #
+# rows, the equivalence of the two storage modes of the game grid and the      #
+# skyline based hard drop. Usage (from any directory):                         #
+#                                                                              #
+#    python -m pytest tests                                                    #
+#                                                                              #
+################################################################################
+
+import os
+import sys
+# the game modules are in the parent directory of this script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random  # used for generating the boards and the moves with a seed
+import subprocess  # used for importing the engine in a new interpreter
+import pytest  # the test framework
+import engine  # the game rules
+from game_grid import GameGrid  # the class for modeling the game grid
+# the class for modeling the tetrominoes and their shared rotation tables
+from tetromino import Tetromino, SHAPES, ROTATION_TABLES
+from tile import Tile  # the class for modeling the tiles
+
+
+# A function that creates a game grid with the given dimensions and storage
+# mode holding the given tiles as {(row, col): value}
+def make_grid(grid_h, grid_w, tiles, compact=False):
+   Tetromino.grid_height, Tetromino.grid_width = grid_h, grid_w
+   grid = GameGrid(grid_h, grid_w, 5, compact)
+   for (row, col), value in tiles.items():
+      if compact:
+         grid.exponent_matrix[row][col] = value.bit_length() - 1
+      else:
+         grid.tile_matrix[row][col] = Tile(value)
+   grid.update_occupancy()
+   return grid
+
+
+# A function that creates a game grid whose cells are occupied randomly with
+# the given probability (so that there are overhangs and holes)
+def make_random_grid(grid_h, grid_w, fill, seed):
+   rng = random.Random(seed)
+   tiles = {(row, col): 2 for row in range(grid_h) for col in range(grid_w)
+            if rng.random() < fill * (1 - row / grid_h)}
+   return make_grid(grid_h, grid_w, tiles)
+
+
+# A test of clearing two adjacent full rows (the second one was skipped
+# before) in both storage modes
+@pytest.mark.parametrize("compact", [False, True])
+def test_adjacent_full_rows_are_cleared(compact):
+   tiles = {(0, 0): 2, (0, 1): 4, (0, 2): 8,
+            (1, 0): 16, (1, 1): 2, (1, 2): 4,
+            (2, 1): 32, (3, 2): 64}
+   grid = make_grid(5, 3, tiles, compact)
+   score_delta, cleared_rows = engine.clear_full_rows(grid)
+   # the values of the tiles in both rows are credited to the score
+   assert cleared_rows == [0, 1]
+   assert score_delta == grid.score == 2 + 4 + 8 + 16 + 2 + 4
+   # the rows above are moved down by two rows
+   assert grid.get_board_key() == make_grid(
+      5, 3, {(0, 1): 32, (1, 2): 64}, compact).get_board_key()
+   assert grid.row_masks == [0b010, 0b100, 0, 0, 0]
+   assert grid.column_heights == [0, 1, 2]
+
+
+# A test of playing the same seeded games with the same moves in both storage
+# modes, which must give the same boards and scores after every step
+@pytest.mark.parametrize("seed", range(10))
+def test_compact_and_tile_modes_give_the_same_game(seed):
+   rng = random.Random(seed)
+   tile_game = engine.GameEngine(seed=seed)
+   compact_game = engine.GameEngine(seed=seed, compact=True)
+   while not tile_game.game_over:
+      action = rng.choice(engine.ACTIONS)
+      tile_game.step(action)
+      compact_game.step(action)
+      assert tile_game.grid.get_board_key() == compact_game.grid.get_board_key()
+      assert tile_game.score == compact_game.score
+      assert tile_game.grid.row_masks == compact_game.grid.row_masks
+      assert tile_game.grid.column_heights == compact_game.grid.column_heights
+   assert compact_game.game_over
+   assert tile_game.pieces == compact_game.pieces
+
+
+# A function that returns the cells of the given tetromino when its bottom
+# left cell is at (x, y) as (col, row) tuples
+def get_cells(tetromino, x, y):
+   return [(x + dx, y + dy) for dx, dy in tetromino.state.cells]
+
+
+# A function that checks cell by cell whether the given tetromino fits the
+# given game grid when its bottom left cell is at (x, y)
+def fits(tetromino, x, y, grid):
+   exponents = grid.get_exponent_matrix()
+   for col, row in get_cells(tetromino, x, y):
+      if col < 0 or col >= grid.grid_width or row < 0:
+         return False
+      if row < grid.grid_height and exponents[row][col] != 0:
+         return False
+   return True
+
+
+# A test of the drop distance computed from the skyline against moving the
+# tetromino down one row at a time, for every tetromino type, rotation state
+# and position that fits random grids (including positions under overhangs)
+@pytest.mark.parametrize("seed", range(5))
+def test_hard_drop_distance_matches_brute_force(seed):
+   grid = make_random_grid(12, 8, 0.7, seed)
+   for shape in SHAPES:
+      tetromino = Tetromino(shape, x=0)
+      for rotation in range(4):
+         tetromino.rotation = rotation
+         for x in range(-3, grid.grid_width):
+            for y in range(-3, grid.grid_height):
+               if not fits(tetromino, x, y, grid):
+                  continue
+               distance = 0
+               while fits(tetromino, x, y - distance - 1, grid):
+                  distance += 1
+               tetromino.bottom_left_cell.x = x
+               tetromino.bottom_left_cell.y = y
+               assert tetromino.get_drop_distance(grid) == distance
+               tetromino.hard_drop(grid)
+               assert tetromino.bottom_left_cell.y == y - distance
+
+
+# A test of copying a game grid with a tetromino being moved, which must copy
+# the tiles and the position of the tetromino but share its rotation tables
+@pytest.mark.parametrize("compact", [False, True])
+def test_grid_copy_shares_the_rotation_tables(compact):
+   game = engine.GameEngine(seed=1, compact=compact)
+   game.apply("rotate")
+   game.apply("left")
+   grid_copy = game.grid.copy()
+   tetromino = game.current_tetromino
+   tetromino_copy = grid_copy.current_tetromino
+   assert tetromino_copy.rotation_states is ROTATION_TABLES[tetromino.type]
+   assert tetromino_copy.rotation == tetromino.rotation
+   assert ([tile.value for tile in tetromino_copy.tiles]
+           == [tile.value for tile in tetromino.tiles])
+   assert not set(map(id, tetromino_copy.tiles)) & set(map(id, tetromino.tiles))
+   # moving the copy does not move the original tetromino
+   x = tetromino.bottom_left_cell.x
+   tetromino_copy.move("right", grid_copy)
+   assert tetromino.bottom_left_cell.x == x
+   assert tetromino_copy.bottom_left_cell.x == x + 1
+
+
+# A test of running a game headlessly, which must not load pygame or tkinter
+# (checked in a new interpreter as the other tests may have loaded them)
+def test_engine_does_not_load_pygame():
+   code = ("import sys, engine\n"
+           "game = engine.GameEngine(seed=1)\n"
+           "while not game.game_over:\n"
+           "   game.step('hard_drop')\n"
+           "print(sorted(name for name in sys.modules\n"
+           "             if name.split('.')[0] in ('pygame', 'tkinter')))\n")
+   game_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+   output = subprocess.run([sys.executable, "-c", code], cwd=game_dir,
+                           capture_output=True, text=True, check=True).stdout
+   assert output.strip() == "[]"
@@ -2,8 +2,61 @@ from tile import Tile  # used for modeling each tile on the tetrominoes
 from point import Point  # used for tile positions
 import copy as cp  # the copy module is used for copying tiles and positions
 import random   # the random module is used for generating random values
-import numpy as np  # the fundamental Python module for scientific computing
-import random
+
+# The size n of the n x n tile matrix and the occupied (non-empty) cells in the
+# tile matrix as (column_index, row_index) for each tetromino type in its
+# initial rotation state (see the documentation given with this code)
+SHAPES = {
+   'I': (4, [(1, 0), (1, 1), (1, 2), (1, 3)]),
+   'O': (2, [(0, 0), (1, 0), (0, 1), (1, 1)]),
+   'Z': (3, [(0, 1), (1, 1), (1, 2), (2, 2)]),
+}
+
+
+# A class for modeling a rotation state of a tetromino. The cells are given as
+# (dx, dy) offsets from the bottom left cell of the n x n tile matrix, which is
+# the coordinate convention used for moving, rotating and drawing tetrominoes.
+class RotationState:
+
+   # A constructor that precomputes the data used for collision checks from
+   # the given cell offsets (the i-th offset belongs to the i-th tile)
+   def __init__(self, n, cells):
+      self.n = n
+      self.cells = cells
+      # the bounding box of the occupied cells
+      self.min_dx = min(dx for dx, dy in cells)
+      self.max_dx = max(dx for dx, dy in cells)
+      self.min_dy = min(dy for dx, dy in cells)
+      self.max_dy = max(dy for dx, dy in cells)
+      # the bitmask of each row (bit dx is set when the cell is occupied)
+      self.row_masks = [0] * n
+      # the lowest occupied dy in each column (None for an empty column)
+      self.bottom_profile = [None] * n
+      for dx, dy in cells:
+         self.row_masks[dy] |= 1 << dx
+         if self.bottom_profile[dx] is None or dy < self.bottom_profile[dx]:
+            self.bottom_profile[dx] = dy
+
+
+# A function that computes the four rotation states of each tetromino type
+# (each rotation turns the n x n tile matrix 90 degrees clockwise)
+def compute_rotation_tables():
+   tables = {}
+   for shape, (n, occupied_cells) in SHAPES.items():
+      # (column_index, row_index) --> (dx, dy) as the row index grows downwards
+      cells = [(col, n - 1 - row) for col, row in occupied_cells]
+      states = []
+      for rotation in range(4):
+         states.append(RotationState(n, cells))
+         # rotating clockwise moves the cell (dx, dy) to (dy, n - 1 - dx)
+         cells = [(dy, n - 1 - dx) for dx, dy in cells]
+      tables[shape] = states
+   return tables
+
+
+# the rotation states of all tetromino types computed once at import
+ROTATION_TABLES = compute_rotation_tables()
+
 
 # A class for modeling tetrominoes with 3 out of 7 different types as I, O and Z
 class Tetromino:
@@ -12,119 +65,64 @@ class Tetromino:
    extra_space = None
 
 
-   # A constructor for creating a tetromino with a given (type)
-   def __init__(self, shape):
+   # A constructor for creating a tetromino with a given (type), horizontal
+   # position x of the bottom left cell and values of the tiles (random ones
+   # are used for x and the values when they are not given)
+   def __init__(self, shape, x=None, values=None):
       self.type = shape  # set the type of this tetromino
-      # determine the occupied (non-empty) cells in the tile matrix based on
-      # the shape of this tetromino (see the documentation given with this code)
-      occupied_cells = []
-
-      if self.type == 'I':
-         n = 4  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino I in its initial rotation state
-         occupied_cells.append((1, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((1, 3))
-
-      elif self.type == 'O':
-         n = 2  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino O in its initial rotation state
-         occupied_cells.append((0, 0))  # (column_index, row_index)
-         occupied_cells.append((1, 0))
-         occupied_cells.append((0, 1))
-         occupied_cells.append((1, 1))
-
-      elif self.type == 'Z':
-         n = 3  # n = number of rows = number of columns in the tile matrix
-         # shape of the tetromino Z in its initial rotation state
-         occupied_cells.append((0, 1))  # (column_index, row_index)
-         occupied_cells.append((1, 1))
-         occupied_cells.append((1, 2))
-         occupied_cells.append((2, 2))
-
-      # create a matrix of numbered tiles based on the shape of this tetromino
-      self.tile_matrix = np.full((n, n), None)
-
-      # create the four tiles (minos) of this tetromino and place these tiles
-      # into the tile matrix
-      for i in range(len(occupied_cells)):
-         col_index, row_index = occupied_cells[i][0], occupied_cells[i][1]
-         # create a tile for each occupied cell of this tetromino
-         self.tile_matrix[row_index][col_index] = Tile()
+      # n = number of rows = number of columns in the tile matrix
+      n, occupied_cells = SHAPES[shape]
+      # the precomputed rotation states of this tetromino and the current one
+      self.rotation_states = ROTATION_TABLES[shape]
+      self.rotation = 0
+      # create the four tiles (minos) of this tetromino (the i-th tile occupies
+      # the i-th cell of each rotation state)
+      if values is None:
+         self.tiles = [Tile() for i in range(len(occupied_cells))]
+      else:
+         self.tiles = [Tile(value) for value in values]
       # initialize the position of this tetromino (as the bottom left cell in
       # the tile matrix) with a random horizontal position above the game grid
       self.bottom_left_cell = Point()
       self.bottom_left_cell.y = Tetromino.grid_height - 1
-      self.bottom_left_cell.x = random.randint(0, Tetromino.grid_width - n)
-
-   # A method that computes and returns the position of the cell in the tile
-   # matrix specified by the given row and column indexes
-
-
-   def get_cell_position(self, row, col):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      position = Point()
-      # horizontal position of the cell
-      position.x = self.bottom_left_cell.x + col
-      # vertical position of the cell
-      position.y = self.bottom_left_cell.y + (n - 1) - row
-      return position
-
-
-   # A method to return a copy of the tile matrix without any empty row/column,
-   # and the position of the bottom left cell when return_position is set
-   def get_min_bounded_tile_matrix(self, return_position=False):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      # determine rows and columns to copy (omit empty rows and columns)
-      min_row, max_row, min_col, max_col = n - 1, 0, n - 1, 0
-      for row in range(n):
-         for col in range(n):
-            if self.tile_matrix[row][col] is not None:
-               if row < min_row:
-                  min_row = row
-               if row > max_row:
-                  max_row = row
-               if col < min_col:
-                  min_col = col
-               if col > max_col:
-                  max_col = col
-
-      # copy the tiles from the tile matrix of this tetromino
-      copy = np.full((max_row - min_row + 1, max_col - min_col + 1), None)
-      for row in range(min_row, max_row + 1):
-         for col in range(min_col, max_col + 1):
-            if self.tile_matrix[row][col] is not None:
-               row_ind = row - min_row
-               col_ind = col - min_col
-               copy[row_ind][col_ind] = cp.deepcopy(self.tile_matrix[row][col])
-
-      # return just the matrix copy when return_position is not set (as True)
-      # the argument return_position defaults to False when a value is not given
-      if not return_position:
-         return copy
-
-      # otherwise return the position of the bottom left cell in copy as well
-      else:
-         blc_position = cp.copy(self.bottom_left_cell)
-         blc_position.translate(min_col, (n - 1) - max_row)
-         return copy, blc_position
+      if x is None:
+         x = random.randint(0, Tetromino.grid_width - n)
+      self.bottom_left_cell.x = x
 
 
-   # A method for drawing the tetromino on the game grid
-   def draw(self):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-      for row in range(n):
-         for col in range(n):
+   # A method for deep copying this tetromino (used by copy.deepcopy), which
+   # copies only its tiles and position as the rotation states are shared
+   # tables that never change
+   def __deepcopy__(self, memo):
+      tetromino_copy = Tetromino.__new__(Tetromino)
+      memo[id(self)] = tetromino_copy
+      tetromino_copy.__dict__.update(self.__dict__)
+      tetromino_copy.tiles = [Tile(tile.value) for tile in self.tiles]
+      position = self.bottom_left_cell
+      tetromino_copy.bottom_left_cell = Point(position.x, position.y)
+      return tetromino_copy
+
+
+   # A property for the current rotation state of this tetromino
+   @property
+   def state(self):
+      return self.rotation_states[self.rotation]
+
 
-            # draw each occupied cell as a tile on the game grid
-            if self.tile_matrix[row][col] is not None:
-               # get the position of the tile
-               position = self.get_cell_position(row, col)
+   # A method that returns the position on the game grid and the tile of each
+   # occupied cell of this tetromino as (x, y, tile) tuples
+   def get_tile_positions(self):
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      return [(x + dx, y + dy, tile)
+              for (dx, dy), tile in zip(self.state.cells, self.tiles)]
 
-               # draw only the tiles that are inside the game grid
-               if position.y < Tetromino.grid_height:
-                  self.tile_matrix[row][col].draw(position)
+
+   # A method for drawing the tetromino on the game grid
+   def draw(self):
+      for x, y, tile in self.get_tile_positions():
+         # draw only the tiles that are inside the game grid
+         if y < Tetromino.grid_height:
+            tile.draw(Point(x, y))
 
 
    # A method for moving this tetromino in a given direction by 1 on the grid
@@ -146,94 +144,80 @@ class Tetromino:
       return True  # a successful move in the given direction
 
 
+   # A method for moving this tetromino down to its landing position at once
    def hard_drop(self, game_grid):
-      # Move down until the tetromino can't move further
-      while self.can_be_moved("down", game_grid):
-         self.move("down", game_grid)
+      self.bottom_left_cell.y -= self.get_drop_distance(game_grid)
+
+
+   # A method that returns the position of the bottom left cell of this
+   # tetromino when it lands if it moves down without moving sideways
+   def get_landing_position(self, game_grid):
+      landing_position = cp.copy(self.bottom_left_cell)
+      landing_position.translate(0, -self.get_drop_distance(game_grid))
+      return landing_position
+
+
+   # A method that returns the number of rows this tetromino can move down by
+   # comparing the lowest cell of each of its columns with the column heights
+   # of the game grid
+   def get_drop_distance(self, game_grid):
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      distance = y + self.state.min_dy  # the distance to the bottom of the grid
+      for dx, bottom_dy in enumerate(self.state.bottom_profile):
+         if bottom_dy is not None:
+            space = y + bottom_dy - game_grid.column_heights[x + dx]
+            # a tile below the highest tile of a column (e.g. a tile moved
+            # under an overhang) cannot use the skyline, so scan row by row
+            if space < 0:
+               distance = 0
+               while self.can_be_placed(x, y - distance - 1, game_grid):
+                  distance += 1
+               return distance
+            distance = min(distance, space)
+      return distance
 
 
    # A method for checking if this tetromino can be moved in a given direction
    def can_be_moved(self, direction, game_grid):
-      n = len(self.tile_matrix)  # n = number of rows = number of columns
-
-      # check for moving left or right
-      if direction == "left" or direction == "right":
-         for row_index in range(n):
-            for col_index in range(n):
-               # direction = left --> check the leftmost tile of each row
-               row, col = row_index, col_index
-               if direction == "left" and self.tile_matrix[row][col] is not None:
-                  # the position of the leftmost tile of the current row
-                  leftmost = self.get_cell_position(row, col)
-                  # if any leftmost tile is at x = 0
-                  if leftmost.x == 0:
-                     return False  # this tetromino cannot be moved left
-                  # if the grid cell on the left of a leftmost tile is occupied
-                  if game_grid.is_occupied(leftmost.y, leftmost.x - 1):
-                     return False  # this tetromino cannot be moved left
-                  # as the leftmost tile of the current row is checked
-                  break  # end the inner for loop
-
-               # direction = right --> check the rightmost tile of each row
-               row, col = row_index, n - 1 - col_index
-               if direction == "right" and self.tile_matrix[row][col] is not None:
-                  # the position of the rightmost tile of the current row
-                  rightmost = self.get_cell_position(row, col)
-                  # if any rightmost tile is at x = grid_width - 1
-                  if rightmost.x == Tetromino.grid_width - 1:
-                     return False  # this tetromino cannot be moved right
-                  # if the grid cell on the right of a rightmost tile is occupied
-                  if game_grid.is_occupied(rightmost.y, rightmost.x + 1):
-                     return False  # this tetromino cannot be moved right
-                  # as the rightmost tile of the current row is checked
-                  break  # end the inner for loop
-
-      # direction = down --> check the bottommost tile of each column
-      else:
-         for col in range(n):
-            for row in range(n - 1, -1, -1):
-               # if the current cell of the tetromino is occupied by a tile
-               if self.tile_matrix[row][col] is not None:
-                  # the position of the bottommost tile of the current col
-                  bottommost = self.get_cell_position(row, col)
-                  # if any bottommost tile is at y = 0
-                  if bottommost.y == 0:
-                     return False  # this tetromino cannot be moved down
-                  # if the grid cell below any bottommost tile is occupied
-                  if game_grid.is_occupied(bottommost.y - 1, bottommost.x):
-                     return False  # this tetromino cannot be moved down
-                  # as the bottommost tile of the current row is checked
-                  break  # end the inner for loop
-      # if this method does not end by returning False before this line
-      return True  # this tetromino can be moved in the given direction
-
-
+      # the position of the bottom left cell after the move
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      if direction == "left":
+         x -= 1
+      elif direction == "right":
+         x += 1
+      else:  # direction == "down"
+         y -= 1
+      # this tetromino can be moved if it fits the grid at the new position
+      return self.can_be_placed(x, y, game_grid)
+
+
+   # A method for checking if this tetromino fits the game grid in the given
+   # rotation state (the current one by default) when its bottom left cell is
+   # at (x, y) by comparing the row bitmasks of the state with those of the
+   # grid (the cells above the topmost grid row are considered empty)
+   def can_be_placed(self, x, y, game_grid, rotation=None):
+      state = self.state if rotation is None else self.rotation_states[rotation]
+      # the tetromino must be inside the grid horizontally and above its bottom
+      if x + state.min_dx < 0 or x + state.max_dx >= game_grid.grid_width:
+         return False
+      if y + state.min_dy < 0:
+         return False
+      # the occupied cells of each row must not overlap the grid tiles
+      last_dy = min(state.max_dy, game_grid.grid_height - 1 - y)
+      for dy in range(state.min_dy, last_dy + 1):
+         mask = state.row_masks[dy]
+         shifted = mask << x if x >= 0 else mask >> -x
+         if game_grid.row_masks[y + dy] & shifted:
+            return False
+      return True
+
+
+   # A method for rotating this tetromino 90 degrees clockwise when the next
+   # rotation state fits the game grid (returns True when it is rotated)
    def rotate(self, game_grid):
-      # Perform for rotation
-      n = len(self.tile_matrix)
-      new_matrix = [[None] * n for _ in range(n)]
-      for y in range(n):
-         for x in range(n):
-            new_matrix[x][n - 1 - y] = self.tile_matrix[y][x]
-
-      # Temporary assignment to check the new position
-      old_matrix = self.tile_matrix
-      self.tile_matrix = new_matrix
-
-      # Check if the new position is valid
-      if not self.is_valid_position(game_grid):
-         self.tile_matrix = old_matrix  # Revert if not valid
-
-
-   def is_valid_position(self, game_grid):
-      # Check for collisions and boundary conditions
-      for y in range(len(self.tile_matrix)):
-         for x in range(len(self.tile_matrix[y])):
-            if self.tile_matrix[y][x] is not None:
-               world_x = self.bottom_left_cell.x + x
-               world_y = self.bottom_left_cell.y - y
-               if (world_x < 0 or world_x >= game_grid.grid_width or
-                       world_y < 0 or world_y >= game_grid.grid_height or
-                       game_grid.is_occupied(world_y, world_x)):
-                  return False
-      return True
\ No newline at end of file
+      next_rotation = (self.rotation + 1) % len(self.rotation_states)
+      x, y = self.bottom_left_cell.x, self.bottom_left_cell.y
+      if not self.can_be_placed(x, y, game_grid, next_rotation):
+         return False
+      self.rotation = next_rotation
+      return True
@@ -1,49 +1,91 @@
 from lib.color import Color
-import lib.stddraw as stddraw  # Assuming stddraw is set up for graphical operations
+from point import Point
+from lazy_module import LazyModule  # used for importing pygame only if needed
+stddraw = LazyModule("lib.stddraw")  # used for drawing the tiles
 import random
 
+# The colors of the tiles indexed by the exponents of their values (a tile
+# with the value 2 ** e has the color TILE_COLORS[e]), shared by all tiles
+DEFAULT_TILE_COLOR = Color(204, 192, 179)
+TILE_COLORS = (
+    DEFAULT_TILE_COLOR,  # 1 is not a tile value
+    Color(238, 228, 218),  # 2
+    Color(237, 224, 200),  # 4
+    Color(242, 177, 121),  # 8
+    Color(245, 149, 99),  # 16
+    Color(246, 124, 95),  # 32
+    Color(246, 94, 59),  # 64
+    Color(237, 207, 114),  # 128
+    Color(237, 204, 97),  # 256
+    Color(237, 200, 80),  # 512
+    Color(237, 197, 63),  # 1024
+    Color(237, 194, 46),  # 2048
+)
+# The colors of the outlines and the values of the tiles
+OUTLINE_COLOR = Color(0, 100, 200)
+TEXT_COLOR = Color(0, 0, 0)
+
+# The pre-rendered tile images (sprites) keyed by (value, tile_size) and the
+# canvas size they are rendered for (they are re-rendered when it changes)
+_sprites = {}
+_sprites_canvas_size = None
+
+
+def get_sprite(value, tile_size=0.5):
+    global _sprites_canvas_size
+    canvas_size = stddraw.getCanvasSize()
+    if canvas_size != _sprites_canvas_size:
+        _sprites.clear()
+        _sprites_canvas_size = canvas_size
+    key = (value, tile_size)
+    if key not in _sprites:
+        # render the tile once with the drawing primitives
+        x, y = stddraw.startSprite()
+        Tile(value).render(Point(x, y), tile_size)
+        _sprites[key] = stddraw.endSprite(x, y)
+    return _sprites[key]
+
+
 class Tile:
+    # Store the attributes in slots instead of a dictionary (smaller tiles)
+    __slots__ = ("value", "color")
+
     def __init__(self, value=None):
         if value is None:
             self.value = random.choice([2, 4])  # Randomly assign a value of 2 or 4
         else:
             self.value = value  # Use the provided value
-        self.merged = False
         self.color = self.determine_color()
 
 
     def determine_color(self):
-        # Example color coding based on value, adjust as necessary
-        color_mapping = {
-            2: Color(238, 228, 218),
-            4: Color(237, 224, 200),
-            8: Color(242, 177, 121),
-            16: Color(245, 149, 99),
-            32: Color(246, 124, 95),
-            64: Color(246, 94, 59),
-            128: Color(237, 207, 114),
-            256: Color(237, 204, 97),
-            512: Color(237, 200, 80),
-            1024: Color(237, 197, 63),
-            2048: Color(237, 194, 46),
-            # Continue with other values if needed...
-        }
-        return color_mapping.get(self.value, Color(204, 192, 179))  # Default color
+        # Look up the color by the exponent of the value (the values above
+        # 2048 use the default color)
+        exponent = self.value.bit_length() - 1
+        if self.value == 1 << exponent and exponent < len(TILE_COLORS):
+            return TILE_COLORS[exponent]
+        return DEFAULT_TILE_COLOR  # Default color
 
 
     def draw(self, position, tile_size=0.5):
+        # Draw the pre-rendered image of a tile with the same value
+        stddraw.drawSprite(get_sprite(self.value, tile_size),
+                           position.x, position.y)
+
+
+    def render(self, position, tile_size=0.5):
         # Set the color for the tile
         stddraw.setPenColor(self.color)
         # Draw the filled square for the tile
         stddraw.filledSquare(position.x, position.y, tile_size)
 
         # Draw the tile's outline with the explicit RGB value
-        stddraw.setPenColor(Color(0, 100, 200))
+        stddraw.setPenColor(OUTLINE_COLOR)
         stddraw.setPenRadius(0.002)  # Set pen radius for outline thickness
         stddraw.square(position.x, position.y, tile_size)
 
         # Draw the tile's value in the center
-        stddraw.setPenColor(Color(0, 0, 0))  # RGB values for black
+        stddraw.setPenColor(TEXT_COLOR)  # black
         stddraw.setFontSize(18)
         stddraw.text(position.x, position.y, str(self.value))
 